@@ -0,0 +1,337 @@
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+import argparse
+import gc
+import importlib
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_DIR = os.path.join(ROOT, "bench", ".images")
+SIZES = {
+    "256": (256, 256),
+    "512": (512, 512),
+    "1080p": (1080, 1920),
+    "4k": (2160, 3840),
+    "8k": (4320, 7680),
+}
+CUT_SIZE = 400
+
+
+def _shared_modules(exercise: str) -> set:
+    """Names of the modules of an exercise that other exercises also have \
+(load_image, axes_overlay...)."""
+    names = set()
+    for other in os.listdir(ROOT):
+        if other != exercise and other.startswith("ex") and os.path.isdir(
+                os.path.join(ROOT, other)):
+            names.update(os.path.splitext(name)[0] for name in os.listdir(
+                os.path.join(ROOT, other)) if name.endswith(".py"))
+    return names
+
+
+def load_exercise(exercise: str, *names: str) -> list:
+    """Imports modules of an exercise directory. Every exercise has its \
+own flat modules (load_image, axes_overlay...), so the ones another \
+exercise also has are removed from sys.modules after the import: the next \
+exercise gets its own copies. The others, such as the kernel modules, \
+stay imported, since Numba reloads cached kernels by module name.
+
+Parameters:
+    exercise (str): Exercise directory, e.g. "ex04".
+    *names (str): Modules to import, e.g. "rotate".
+
+Returns:
+    list: The modules.
+    """
+    directory = os.path.join(ROOT, exercise)
+    shared = _shared_modules(exercise)
+    sys.path.insert(0, directory)
+    try:
+        return [importlib.import_module(name) for name in names]
+    finally:
+        sys.path.remove(directory)
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None) or ""
+            if name in shared and \
+                    os.path.dirname(os.path.abspath(path)) == directory:
+                del sys.modules[name]
+
+
+def synthetic_jpeg(name: str, height: int, width: int,
+                   directory: str = IMAGE_DIR) -> str:
+    """Generates (once) a JPEG of gradients and noise, which compresses \
+and decodes like a photograph rather than a flat image.
+
+Parameters:
+    name (str): Size name, used as file name.
+    height (int): Image height.
+    width (int): Image width.
+    directory (str): Directory of the generated images.
+
+Returns:
+    str: Path of the JPEG.
+    """
+    path = os.path.join(directory, f"synthetic_{name}.jpg")
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+
+    rng = np.random.default_rng(42)
+    ys = np.linspace(0, 1, height, dtype=np.float32)[:, np.newaxis]
+    xs = np.linspace(0, 1, width, dtype=np.float32)[np.newaxis, :]
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    for channel, phase in enumerate((0.0, 2.1, 4.2)):
+        wave = 127 + 100 * np.sin(6 * xs + 4 * ys + phase) * np.cos(3 * ys)
+        noise = rng.normal(0, 12, (height, width)).astype(np.float32)
+        img[..., channel] = np.clip(wave + noise, 0, 255)
+    Image.fromarray(img).save(path, quality=90)
+    return path
+
+
+def _quiet(func):
+    """Wraps a function printing its results (ft_load...) so it runs with \
+stdout discarded."""
+    def run():
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            return func()
+    return run
+
+
+def _rss(field: str) -> int | None:
+    """Reads a memory field (VmRSS, VmHWM) of /proc/self/status, in bytes.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Resets the peak RSS of the process (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure(func, pixels: int, repeat: int) -> dict:
+    """Times a stage and measures the memory it allocates.
+
+Parameters:
+    func (Callable[[], object]): The stage.
+    pixels (int): Pixels processed by a call, for the throughput.
+    repeat (int): Number of timing rounds.
+
+Returns:
+    dict: seconds_min, seconds_median, mpix_per_s, tracemalloc_peak_bytes \
+(peak of the memory allocated during one call) and rss_peak_bytes (growth \
+of the peak resident set over the resident set before the call, 0 when \
+the allocator reuses freed pages; None off Linux).
+    """
+    func()
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = np.array(timer.repeat(repeat, number)) / number
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    gc.collect()
+    rss_peak = None
+    if _reset_peak_rss():
+        before = _rss("VmRSS")
+        func()
+        rss_peak = max(0, _rss("VmHWM") - before)
+
+    return {
+        "seconds_min": float(times.min()),
+        "seconds_median": float(np.median(times)),
+        "mpix_per_s": pixels / 1e6 / float(np.median(times)),
+        "tracemalloc_peak_bytes": traced_peak,
+        "rss_peak_bytes": rss_peak,
+    }
+
+
+def build_stages(path: str) -> list:
+    """Builds the stages benchmarked on one image: every function of the \
+hot path on its own, on the same inputs as the exercise programs, then \
+each program end to end from the JPEG file.
+
+Parameters:
+    path (str): The JPEG image.
+
+Returns:
+    list[tuple[str, Callable, int]]: (stage name, stage, pixels processed).
+    """
+    (ex02_load,) = load_exercise("ex02", "load_image")
+    (zoom,) = load_exercise("ex03", "zoom")
+    (rotate,) = load_exercise("ex04", "rotate")
+    load_image, pimp = load_exercise("ex05", "load_image", "pimp_image")
+
+    img = _quiet(lambda: ex02_load.ft_load(path))()
+    if img is None:
+        raise ValueError(f"Cannot load '{path}'")
+    pixels = img.shape[0] * img.shape[1]
+
+    zoomed = zoom.zoom(img, CUT_SIZE)
+    zoom_gray = zoom.rgb_to_gray(zoomed)
+    square = rotate.cut(img, CUT_SIZE)
+    gray = rotate.rgb_to_gray(square)
+    flat_gray = gray.squeeze()
+    transposed = rotate.transpose(flat_gray)
+    full_gray = rotate.rgb_to_gray(img).squeeze()
+    crop = square.shape[0] * square.shape[1]
+
+    def ex03_program():
+        gray = zoom.rgb_to_gray(zoom.zoom(load_image.ft_load(path), CUT_SIZE))
+        return zoom.draw_axes_outside(gray)
+
+    def ex04_program():
+        square = rotate.cut(load_image.ft_load(path), CUT_SIZE)
+        gray = rotate.rgb_to_gray(square).squeeze()
+        return rotate.draw_axes_outside(rotate.transpose(gray))
+
+    def ex05_program():
+        return pimp.pimp_all(load_image.ft_load(path))
+
+    return [
+        ("ex02.ft_load", _quiet(lambda: ex02_load.ft_load(path)), pixels),
+        ("ex03.zoom", lambda: zoom.zoom(img, CUT_SIZE), crop),
+        ("ex03.rgb_to_gray", lambda: zoom.rgb_to_gray(zoomed), crop),
+        ("ex03.draw_axes_outside",
+         lambda: zoom.draw_axes_outside(zoom_gray), crop),
+        ("ex04.cut", lambda: rotate.cut(img, CUT_SIZE), crop),
+        ("ex04.rgb_to_gray", lambda: rotate.rgb_to_gray(square), crop),
+        ("ex04.transpose", lambda: rotate.transpose(flat_gray), crop),
+        ("ex04.draw_axes_outside",
+         lambda: rotate.draw_axes_outside(transposed), crop),
+        ("ex04.rgb_to_gray[full]", lambda: rotate.rgb_to_gray(img), pixels),
+        ("ex04.transpose[full]",
+         lambda: rotate.transpose(full_gray), pixels),
+        ("ex05.ft_invert", lambda: pimp.ft_invert(img), pixels),
+        ("ex05.ft_red", lambda: pimp.ft_red(img), pixels),
+        ("ex05.ft_green", lambda: pimp.ft_green(img), pixels),
+        ("ex05.ft_blue", lambda: pimp.ft_blue(img), pixels),
+        ("ex05.ft_grey", lambda: pimp.ft_grey(img), pixels),
+        ("ex05.pimp_all", lambda: pimp.pimp_all(img), pixels),
+        ("end_to_end.ex03", _quiet(ex03_program), pixels),
+        ("end_to_end.ex04", _quiet(ex04_program), pixels),
+        ("end_to_end.ex05", _quiet(ex05_program), pixels),
+    ]
+
+
+def run(sizes: list, repeat: int = 5, stages: list = None,
+        verbose: bool = True) -> dict:
+    """Runs the benchmarks on synthetic images of the given sizes.
+
+Parameters:
+    sizes (list[str]): Size names, see SIZES.
+    repeat (int): Number of timing rounds per stage.
+    stages (list[str]): Optional stage name prefixes to run, e.g. \
+["ex04", "end_to_end"].
+    verbose (bool): Print each result as it is measured.
+
+Returns:
+    dict: {"meta": {...}, "results": {size: {stage: measures}}}.
+    """
+    results = {}
+    for size in sizes:
+        if size not in SIZES:
+            raise ValueError(f"Unknown size '{size}', expected one of "
+                             f"{', '.join(SIZES)}")
+        path = synthetic_jpeg(size, *SIZES[size])
+        results[size] = {}
+        for name, func, pixels in build_stages(path):
+            if stages and not name.startswith(tuple(stages)):
+                continue
+            results[size][name] = measure(func, pixels, repeat)
+            if verbose:
+                print_result(size, name, results[size][name])
+            gc.collect()
+
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def print_result(size: str, name: str, result: dict):
+    """Prints one measure of `run`.
+
+Parameters:
+    size (str): Size name.
+    name (str): Stage name.
+    result (dict): Measures returned by `measure`.
+
+Returns:
+    None
+    """
+    rss = result["rss_peak_bytes"]
+    rss = "n/a" if rss is None else f"{rss / 1e6:.1f} MB"
+    print(f"{size:>6} {name:<24} {result['seconds_median'] * 1e3:10.3f} ms "
+          f"{result['mpix_per_s']:10.1f} Mpix/s "
+          f"alloc {result['tracemalloc_peak_bytes'] / 1e6:8.1f} MB "
+          f"rss {rss}")
+
+
+def main():
+    """Runs the benchmarks and writes the results as JSON.
+
+Parameters:
+    None
+
+Returns:
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the image pipeline of ex02 to ex05.")
+    parser.add_argument("--sizes", default=",".join(SIZES),
+                        help="comma separated sizes among "
+                             f"{', '.join(SIZES)}")
+    parser.add_argument("--stages", default="",
+                        help="comma separated stage name prefixes")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    try:
+        report = run(args.sizes.split(","), args.repeat,
+                     [s for s in args.stages.split(",") if s])
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    except KeyboardInterrupt:
+        print("\nBenchmark: Operation cancelled by user (Ctrl+C).")
+    except Exception as e:
+        print(f"Exception: Benchmark: {e}")
+    finally:
+        print("\nProgram ended...")
+
+
+if __name__ == "__main__":
+    main()
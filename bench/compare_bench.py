@@ -0,0 +1,129 @@
+import argparse
+import json
+import sys
+
+
+TIME_THRESHOLD = 0.10
+MEMORY_THRESHOLD = 0.20
+MIN_SECONDS = 50e-6
+
+
+def compare(baseline: dict, current: dict,
+            time_threshold: float = TIME_THRESHOLD,
+            memory_threshold: float = MEMORY_THRESHOLD,
+            min_seconds: float = MIN_SECONDS) -> list:
+    """Compares two reports written by bench_pipeline.py, stage by stage.
+
+A stage regresses when its median time grows by more than time_threshold \
+(and by more than min_seconds, so timer noise on microsecond stages is \
+ignored), or its tracemalloc peak by more than memory_threshold.
+
+Parameters:
+    baseline (dict): The reference report.
+    current (dict): The new report.
+    time_threshold (float): Allowed relative slowdown, e.g. 0.10.
+    memory_threshold (float): Allowed relative allocation growth.
+    min_seconds (float): Slowdowns below this many seconds are ignored.
+
+Returns:
+    list[dict]: One row per stage found in both reports, with size, \
+stage, baseline and current seconds and bytes, time and memory ratios, and \
+status ("regression", "improvement" or "ok").
+    """
+    rows = []
+    for size, stages in current["results"].items():
+        for stage, new in stages.items():
+            old = baseline["results"].get(size, {}).get(stage)
+            if old is None:
+                continue
+            old_s, new_s = old["seconds_median"], new["seconds_median"]
+            old_b = old["tracemalloc_peak_bytes"]
+            new_b = new["tracemalloc_peak_bytes"]
+            time_ratio = new_s / old_s if old_s else 1.0
+            memory_ratio = new_b / old_b if old_b else (
+                1.0 if not new_b else float("inf"))
+
+            slower = (time_ratio > 1 + time_threshold
+                      and new_s - old_s > min_seconds)
+            faster = (time_ratio < 1 - time_threshold
+                      and old_s - new_s > min_seconds)
+            if slower or memory_ratio > 1 + memory_threshold:
+                status = "regression"
+            elif faster or memory_ratio < 1 - memory_threshold:
+                status = "improvement"
+            else:
+                status = "ok"
+            rows.append({
+                "size": size, "stage": stage,
+                "baseline_seconds": old_s, "current_seconds": new_s,
+                "baseline_bytes": old_b, "current_bytes": new_b,
+                "time_ratio": time_ratio, "memory_ratio": memory_ratio,
+                "status": status,
+            })
+    return rows
+
+
+def print_rows(rows: list):
+    """Prints the rows returned by `compare` as a table.
+
+Parameters:
+    rows (list[dict]): The rows.
+
+Returns:
+    None
+    """
+    print(f"{'size':>6} {'stage':<24} {'baseline':>12} {'current':>12} "
+          f"{'time':>7} {'alloc':>7}  status")
+    for row in rows:
+        print(f"{row['size']:>6} {row['stage']:<24} "
+              f"{row['baseline_seconds'] * 1e3:9.3f} ms "
+              f"{row['current_seconds'] * 1e3:9.3f} ms "
+              f"{row['time_ratio']:6.2f}x {row['memory_ratio']:6.2f}x  "
+              f"{row['status']}")
+
+
+def main():
+    """Compares a benchmark report to a baseline. Exits with status 1 when \
+a stage regressed, so it can gate a change.
+
+Parameters:
+    None
+
+Returns:
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Compares bench_pipeline.py results to a baseline.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--time-threshold", type=float,
+                        default=TIME_THRESHOLD)
+    parser.add_argument("--memory-threshold", type=float,
+                        default=MEMORY_THRESHOLD)
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS)
+    args = parser.parse_args()
+
+    regressions = 0
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.time_threshold,
+                       args.memory_threshold, args.min_seconds)
+        print_rows(rows)
+        regressions = sum(row["status"] == "regression" for row in rows)
+        print(f"\n{len(rows)} stages compared, {regressions} regressions, "
+              f"{sum(row['status'] == 'improvement' for row in rows)} "
+              "improvements")
+
+    except Exception as e:
+        print(f"Exception: Compare Program: {e}")
+        regressions = 1
+    finally:
+        print("\nProgram ended...")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
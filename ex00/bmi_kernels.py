@@ -0,0 +1,142 @@
+from contextlib import contextmanager
+import os
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Kernels may be launched from worker threads (thread pools of the image
+# programs): Numba's TBB layer then hangs at interpreter exit, OpenMP does
+# not. The NUMBA_THREADING_LAYER* variables still take precedence.
+if numba is not None and not any(
+        name.startswith("NUMBA_THREADING_LAYER") for name in os.environ):
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+
+BACKENDS = ("numpy", "numba")
+ENV_VAR = "FT_BACKEND"
+
+
+def _jit(func):
+    """Compiles a kernel with Numba (parallel loops), when installed."""
+    if numba is None:
+        return func
+    return numba.njit(parallel=True, cache=True)(func)
+
+
+prange = numba.prange if numba is not None else range
+
+
+def available_backends() -> tuple:
+    """Returns the backends that can be selected on this installation."""
+    return BACKENDS if numba is not None else ("numpy",)
+
+
+def _initial_backend() -> str:
+    """Backend selected by the FT_BACKEND environment variable: "numpy", \
+"numba" or "auto" (the default: numba when installed). A backend that is \
+not installed falls back to numpy."""
+    name = os.environ.get(ENV_VAR, "auto").lower()
+    if name == "auto":
+        return available_backends()[-1]
+    return name if name in available_backends() else "numpy"
+
+
+_backend = _initial_backend()
+
+
+def get_backend() -> str:
+    """Returns the name of the selected backend."""
+    return _backend
+
+
+def set_backend(name: str):
+    """Selects the backend running the kernels.
+
+Parameters:
+    name (str): "numpy" or "numba".
+
+Returns:
+    None
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'")
+    if name not in available_backends():
+        raise ValueError(f"Backend '{name}' is not installed")
+    _backend = name
+
+
+@contextmanager
+def use_backend(name: str):
+    """Selects a backend for the duration of a with block."""
+    previous = get_backend()
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+def jit_enabled() -> bool:
+    """Returns True when the compiled kernels are selected."""
+    return _backend == "numba"
+
+
+@_jit
+def _count_non_finite(values):
+    count = 0
+    for i in prange(values.shape[0]):
+        if not np.isfinite(values[i]):
+            count += 1
+    return count
+
+
+@_jit
+def _bmi_kernel(height, weight, out):
+    count = 0
+    for i in prange(height.shape[0]):
+        squared = height[i] * height[i]
+        if not np.isfinite(squared):
+            count += 1
+        out[i] = weight[i] / squared
+    return count
+
+
+def non_finite(values) -> bool:
+    """Checks if any value is infinite or NaN, in one pass.
+
+Parameters:
+    values (np.ndarray): float64 values of any shape.
+
+Returns:
+    bool: True if a value is infinite or NaN, False otherwise.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64).ravel()
+    if jit_enabled():
+        return _count_non_finite(values) > 0
+    return not np.isfinite(values).all()
+
+
+def bmi(height, weight) -> tuple[np.ndarray, bool]:
+    """Computes weight / height ** 2 element by element, fused with the \
+overflow check of height ** 2.
+
+Parameters:
+    height (np.ndarray): float64 heights.
+    weight (np.ndarray): float64 weights of the same shape.
+
+Returns:
+    tuple[np.ndarray, bool]: The BMI values, and True if a squared height \
+is infinite or NaN.
+    """
+    height = np.ascontiguousarray(height, dtype=np.float64).ravel()
+    weight = np.ascontiguousarray(weight, dtype=np.float64).ravel()
+    if jit_enabled():
+        out = np.empty_like(height)
+        return out, _bmi_kernel(height, weight, out) > 0
+    with np.errstate(over="ignore", invalid="ignore"):
+        squared = height ** 2
+        return weight / squared, not np.isfinite(squared).all()
@@ -1,4 +1,5 @@
 import numpy as np
+import bmi_kernels
 
 
 def is_instance_of_list(obj: object) -> bool:
@@ -142,21 +143,16 @@ Returns:
             raise ValueError("Height values must be positive")
         if are_all_positive_numbers(weight) is False:
             raise ValueError("Weight values must be positive")
-        if any(check_overflow(item) for item in height):
+        height_np = np.array(height, dtype=np.float64)
+        weight_np = np.array(weight, dtype=np.float64)
+        if bmi_kernels.non_finite(height_np):
             raise OverflowError("Overflow detected in height list")
-        if any(check_overflow(item) for item in weight):
+        if bmi_kernels.non_finite(weight_np):
             raise OverflowError("Overflow detected in weight list")
 
-        for h in height:
-            if check_overflow(h ** 2):
-                raise OverflowError("Overflow detected in height squared")
-        for w in weight:
-            if check_overflow(w):
-                raise OverflowError("Overflow detected in weight value")
-
-        height_np = np.array(height)
-        weight_np = np.array(weight)
-        bmi_np = weight_np / (height_np ** 2)
+        bmi_np, overflow = bmi_kernels.bmi(height_np, weight_np)
+        if overflow:
+            raise OverflowError("Overflow detected in height squared")
 
         return bmi_np.tolist()
 
@@ -199,7 +195,7 @@ Returns:
 
         bmi_np = np.array(bmi)
 
-        if any(check_overflow(item) for item in bmi_np):
+        if bmi_kernels.non_finite(bmi_np):
             raise OverflowError("Overflow detected in BMI list")
 
         return (bmi_np > limit).tolist()
@@ -44,68 +44,19 @@ Returns:
     return True
 
 
-def has_2_elements(family: list) -> bool:
-    """Check if each sublist in the provided list has exactly 2 elements.
+def is_nested_numbers(family: list) -> bool:
+    """Check if the nested lists of the family only hold lists or numbers \
+at each level, whatever their lengths.
 
 Parameters:
     family (list): The list of lists to check.
 
 Returns:
-    bool: True if each sublist has 2 elements, False otherwise.
+    bool: True if the leaves are int or float, False otherwise.
     """
-    for item in family:
-        if len(item) != 2:
-            return False
-    return True
-
-
-def is_list_of_2_numbers(family: list) -> bool:
-    """Check if each sublist elements in the family are of type int or float.
-
-Parameters:
-    family (list): The list of lists to check.
-
-Returns:
-    bool: True if each sublist elements are int or float, False otherwise.
-    """
-    for item in family:
-        for element in item:
-            if isinstance(element, (int, float)) is False:
-                return False
-    return True
-
-
-def are_all_positive_numbers(family: list) -> bool:
-    """Check if each sublist elements in the family are positive numbers.
-
-Parameters:
-    family (list): The list of lists to check.
-
-Returns:
-    bool: True if each sublist elements are positive numbers, False otherwise.
-    """
-    for item in family:
-        for element in item:
-            if element <= 0:
-                return False
-    return True
-
-
-def check_overflow(family: list) -> bool:
-    """Check if any element in the sublists exceeds the maximum float value.
-
-Parameters:
-    family (list): The list of lists to check.
-
-Returns:
-    bool: True if any element exceeds the maximum float value, False otherwise.
-    """
-    for item in family:
-        for element in item:
-            arr = np.array([element], dtype=np.float64)
-            if np.isinf(arr[0]) or np.isnan(arr[0]):
-                return True
-    return False
+    if all(is_list_type(item) for item in family):
+        return all(is_nested_numbers(item) for item in family)
+    return all(isinstance(item, (int, float)) for item in family)
 
 
 def are_start_end_int(start: int, end: int) -> bool:
@@ -123,41 +74,133 @@ Returns:
     return True
 
 
-def slice_me(family: list, start: int, end: int) -> list:
-    """Slices a list from start index to end index, \
-prints the original and new shapes, and returns the result as a list of lists.
+def to_records(family) -> np.ndarray:
+    """Converts a family to an array of records, the last axis holding \
+the fields of each person.
 
 Parameters:
-    family (list): The list to be sliced.
-    start (int): The starting index for slicing.
-    end (int): The ending index for slicing.
+    family (list | np.ndarray): A list of [field, ...] lists, a list of \
+such families, or an array of shape (..., rows, fields).
 
 Returns:
-    list: The sliced list
+    np.ndarray: The records (the array itself when it already is one).
     """
-    try:
+    if isinstance(family, np.ndarray):
+        records = family
+    else:
         if is_list_type(family) is False:
             raise TypeError("family must be a list")
         if is_empty(family) is True:
             raise ValueError("family must not be empty")
         if is_list_of_lists(family) is False:
             raise TypeError("family must be a list of lists")
-        if has_2_elements(family) is False:
-            raise ValueError("each sublist in family must have 2 elements")
-        if is_list_of_2_numbers(family) is False:
+        try:
+            records = np.array(family)
+        except ValueError:
+            if is_nested_numbers(family) is False:
+                raise TypeError("each sublist elements must be int or float")
+            raise ValueError("each sublist in family must have the same "
+                             "number of elements")
+
+    if records.ndim < 2:
+        raise TypeError("family must be a list of lists")
+    if records.size == 0:
+        raise ValueError("family must not be empty")
+    if records.dtype == object:
+        try:
+            records = records.astype(np.float64)
+        except (TypeError, ValueError):
             raise TypeError("each sublist elements must be int or float")
-        if are_all_positive_numbers(family) is False:
-            raise ValueError("each sublist elements must be positive numbers")
-        if check_overflow(family) is True:
-            raise OverflowError("overflow detected in family elements")
+    if records.dtype.kind not in "biuf":
+        raise TypeError("each sublist elements must be int or float")
+    return records
+
+
+def validate_columns(records: np.ndarray):
+    """Checks that every field of the records is a positive finite number, \
+with one vectorized pass per check over each column.
+
+Parameters:
+    records (np.ndarray): Records of shape (..., fields), e.g. a strided \
+view of some columns.
+
+Returns:
+    None
+    """
+    axes = tuple(range(records.ndim - 1))
+    not_positive = np.flatnonzero((records <= 0).any(axis=axes))
+    if len(not_positive):
+        raise ValueError("each sublist elements must be positive numbers "
+                         f"(column {not_positive[0]})")
+    if records.dtype.kind == "f":
+        non_finite = np.flatnonzero(~np.isfinite(records).all(axis=axes))
+        if len(non_finite):
+            raise OverflowError("overflow detected in family elements "
+                                f"(column {non_finite[0]})")
+
+
+def slice_me(
+        family: list | np.ndarray,
+        start: int,
+        end: int,
+        step: int = None,
+        columns: int | slice = None,
+        rows: slice = None
+        ) -> list | np.ndarray:
+    """Slices a family from start index to end index, \
+prints the original and new shapes, and returns the result.
+
+Records may have any number of fields, and a batch of families of the \
+same size may be given as a list of families or an array of shape \
+(..., rows, fields). The selection only uses NumPy basic indexing: an \
+array family gives a view of it, never a copy. Only the selected columns \
+are validated, one vectorized pass per column, so projecting one column \
+of a large table reads that column alone.
+
+Parameters:
+    family (list | np.ndarray): The family (or batch of families).
+    start (int): The starting index for slicing the first axis.
+    end (int): The ending index for slicing the first axis.
+    step (int): Optional step of the first axis.
+    columns (int | slice): Optional fields to keep; an int drops the \
+field axis.
+    rows (slice): Optional slice of the records of each family, for a \
+batch of families.
+
+Returns:
+    list | np.ndarray: The sliced list, or a view when family is an array.
+    """
+    try:
+        records = to_records(family)
+        if columns is not None and not isinstance(columns, (int, slice)):
+            raise TypeError("columns must be an integer or a slice")
+        fields = slice(None) if columns is None else columns
+        if isinstance(fields, int) and not (
+                -records.shape[-1] <= fields < records.shape[-1]):
+            raise ValueError(f"column {fields} does not exist")
+        selected = records[..., fields]
+        validate_columns(selected if isinstance(fields, slice)
+                         else selected[..., np.newaxis])
+
         if are_start_end_int(start, end) is False:
             raise TypeError("start and end must be integers")
-
-        family_arr = np.array(family)
-        print(f"My shape is : {family_arr.shape}")
-        sliced_family = family_arr[start:end]
+        if step is not None and not isinstance(step, int):
+            raise TypeError("step must be an integer")
+        if rows is not None:
+            if not isinstance(rows, slice):
+                raise TypeError("rows must be a slice")
+            if records.ndim < 3:
+                raise ValueError("rows needs a batch of families")
+
+        index = (slice(start, end, step),)
+        if records.ndim > 2:
+            index += (Ellipsis, slice(None) if rows is None else rows)
+        print(f"My shape is : {records.shape}")
+        sliced_family = records[index + (fields,)]
         print(f"My new shape is : {sliced_family.shape}")
 
+        if isinstance(family, np.ndarray):
+            return sliced_family
         return sliced_family.tolist()
 
     except (TypeError, ValueError, OverflowError):
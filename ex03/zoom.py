@@ -1,4 +1,6 @@
 from load_image import ft_load
+from axes_overlay import blit_axes
+import zoom_kernels
 import numpy as np
 import cv2
 
@@ -46,6 +48,8 @@ grayscale.
         raise ValueError("Invalid image dimensions")
 
     if len(img.shape) == 3 and img.shape[2] == 3:
+        if zoom_kernels.jit_enabled() and img.dtype == np.uint8:
+            return zoom_kernels.rgb_to_gray(img)
         gray = np.dot(img[..., :3], [0.2989, 0.5870, 0.1140])
         gray = np.array(gray, dtype=np.uint8)
         gray = gray[..., np.newaxis]
@@ -71,67 +75,22 @@ Returns:
     print(zoomed_img)
 
 
-def draw_axes_outside(img: np.ndarray):
+def draw_axes_outside(img: np.ndarray, out: np.ndarray = None):
     """Draws X and Y axes outside the image with ticks and numbers.
 
+The margin, axes, ticks and labels are rendered once per image size and \
+cached, so each call only copies the image into the canvas.
+
 Parameters:
     img (np.ndarray): Input grayscale image (H, W) or (H, W, 1).
+    out (np.ndarray): Optional canvas returned by a previous call for an \
+image of the same size, reused instead of allocating a new one.
 
 Returns:
     np.ndarray: Image with axes drawn outside (canvas of size \
 H+margin x W+margin).
     """
-    height, width = img.shape[:2]
-    margin = 40
-
-    if height < 1 or width < 1:
-        raise ValueError("Image too small for drawing axes")
-
-    if img.ndim == 3 and img.shape[2] == 1:
-        img = img.squeeze()
-
-    canvas = np.ones((height + margin, width + margin), dtype=img.dtype) * 255
-    canvas[:height, margin:] = img
-
-    axis_color = 0
-    tick_size = 5
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 0.4
-    thickness = 1
-
-    cv2.line(canvas, (margin, height), (
-        width + margin - 1, height), axis_color, 1)  # x axis
-    cv2.line(canvas, (margin, 0), (
-        margin, height - 1), axis_color, 1)  # y axis
-
-    for x in range(0, width, 50):
-        px = margin + x
-        cv2.line(canvas, (px, height), (
-            px, height + tick_size), axis_color, 1)
-
-        text = str(x)
-        text_size = cv2.getTextSize(
-            text, font, font_scale, thickness)[0]  # ex.: (w 18px, h 8px)
-        text_x = px - text_size[0] // 2  # text x position (centralized)
-        text_y = height + tick_size + text_size[1] + 2  # text y position
-
-        cv2.putText(canvas, text, (
-            text_x, text_y), font, font_scale, axis_color, thickness)
-
-    for y in range(0, height, 50):
-        py = y
-        cv2.line(canvas, ((margin - tick_size), py), (
-            margin, py), axis_color, 1)
-
-        text = str(y)
-        text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
-        text_x = margin - tick_size - text_size[0] - 2
-        text_y = py + text_size[1] // 2
-
-        cv2.putText(canvas, text, (
-            text_x, text_y), font, font_scale, axis_color, thickness)
-
-    return canvas
+    return blit_axes(img, out)
 
 
 def show_image(img: np.ndarray):
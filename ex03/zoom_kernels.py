@@ -0,0 +1,123 @@
+from contextlib import contextmanager
+import os
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Kernels may be launched from worker threads (thread pools of the image
+# programs): Numba's TBB layer then hangs at interpreter exit, OpenMP does
+# not. The NUMBA_THREADING_LAYER* variables still take precedence.
+if numba is not None and not any(
+        name.startswith("NUMBA_THREADING_LAYER") for name in os.environ):
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+
+BACKENDS = ("numpy", "numba")
+ENV_VAR = "FT_BACKEND"
+GRAY_WEIGHTS = (0.2989, 0.5870, 0.1140)
+# Below this distance to an integer, the loop and BLAS sums of the gray
+# weights may truncate to different levels (BLAS uses fused multiply-adds).
+GRAY_EPSILON = 1e-9
+
+
+def _jit(func):
+    """Compiles a kernel with Numba (parallel loops), when installed."""
+    if numba is None:
+        return func
+    return numba.njit(parallel=True, cache=True)(func)
+
+
+prange = numba.prange if numba is not None else range
+
+
+def available_backends() -> tuple:
+    """Returns the backends that can be selected on this installation."""
+    return BACKENDS if numba is not None else ("numpy",)
+
+
+def _initial_backend() -> str:
+    """Backend selected by the FT_BACKEND environment variable: "numpy", \
+"numba" or "auto" (the default: numba when installed). A backend that is \
+not installed falls back to numpy."""
+    name = os.environ.get(ENV_VAR, "auto").lower()
+    if name == "auto":
+        return available_backends()[-1]
+    return name if name in available_backends() else "numpy"
+
+
+_backend = _initial_backend()
+
+
+def get_backend() -> str:
+    """Returns the name of the selected backend."""
+    return _backend
+
+
+def set_backend(name: str):
+    """Selects the backend running the kernels.
+
+Parameters:
+    name (str): "numpy" or "numba".
+
+Returns:
+    None
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'")
+    if name not in available_backends():
+        raise ValueError(f"Backend '{name}' is not installed")
+    _backend = name
+
+
+@contextmanager
+def use_backend(name: str):
+    """Selects a backend for the duration of a with block."""
+    previous = get_backend()
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+def jit_enabled() -> bool:
+    """Returns True when the compiled kernels are selected."""
+    return _backend == "numba"
+
+
+@_jit
+def _gray_kernel(pixels, weights, epsilon, out, ambiguous):
+    for i in prange(pixels.shape[0]):
+        value = (pixels[i, 0] * weights[0] + pixels[i, 1] * weights[1]
+                 + pixels[i, 2] * weights[2])
+        fraction = value - np.floor(value)
+        ambiguous[i] = fraction < epsilon or fraction > 1 - epsilon
+        out[i] = np.uint8(value)
+
+
+def rgb_to_gray(img) -> np.ndarray:
+    """Compiled grayscale conversion of a uint8 (H, W, 3) image, with the \
+same levels as np.dot(img, GRAY_WEIGHTS) truncated to uint8: the few \
+pixels whose level lies within GRAY_EPSILON of an integer are computed \
+again with np.dot.
+
+Parameters:
+    img (np.ndarray): uint8 (H, W, 3) image.
+
+Returns:
+    np.ndarray: uint8 (H, W, 1) grayscale image.
+    """
+    pixels = np.ascontiguousarray(img).reshape(-1, 3)
+    gray = np.empty(len(pixels), dtype=np.uint8)
+    ambiguous = np.empty(len(pixels), dtype=np.bool_)
+    _gray_kernel(pixels, np.array(GRAY_WEIGHTS), GRAY_EPSILON,
+                 gray, ambiguous)
+    if ambiguous.any():
+        gray[ambiguous] = np.array(
+            np.dot(pixels[ambiguous][np.newaxis], GRAY_WEIGHTS)[0],
+            dtype=np.uint8)
+    return gray.reshape(img.shape[:2] + (1,))
@@ -0,0 +1,166 @@
+from functools import lru_cache
+import numpy as np
+import cv2
+
+
+MARGIN = 40
+TICK_SPACING = 50
+TICK_SIZE = 5
+AXIS_COLOR = 0
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.4
+THICKNESS = 1
+
+
+def draw_overlay(
+        canvas: np.ndarray,
+        height: int,
+        width: int,
+        margin: int = MARGIN,
+        tick_spacing: int = TICK_SPACING,
+        tick_size: int = TICK_SIZE,
+        axis_color: int = AXIS_COLOR,
+        font: int = FONT,
+        font_scale: float = FONT_SCALE,
+        thickness: int = THICKNESS
+        ):
+    """Draws the axes, ticks and labels of an image of size (height, width) \
+on a canvas of size (height+margin, width+margin).
+
+Parameters:
+    canvas (np.ndarray): Canvas to draw on, modified in place.
+    height (int): Image height.
+    width (int): Image width.
+    margin (int): Space reserved for the axes, left and below the image.
+    tick_spacing (int): Distance in pixels between two ticks.
+    tick_size (int): Length of the ticks.
+    axis_color (int): Color of axes, ticks and labels.
+    font (int): OpenCV font face of the labels.
+    font_scale (float): OpenCV font scale of the labels.
+    thickness (int): Thickness of the labels.
+
+Returns:
+    None
+    """
+    cv2.line(canvas, (margin, height), (
+        width + margin - 1, height), axis_color, 1)  # x axis
+    cv2.line(canvas, (margin, 0), (
+        margin, height - 1), axis_color, 1)  # y axis
+
+    for x in range(0, width, tick_spacing):
+        px = margin + x
+        cv2.line(canvas, (px, height), (
+            px, height + tick_size), axis_color, 1)
+
+        text = str(x)
+        text_size = cv2.getTextSize(
+            text, font, font_scale, thickness)[0]  # ex.: (w 18px, h 8px)
+        text_x = px - text_size[0] // 2  # text x position (centralized)
+        text_y = height + tick_size + text_size[1] + 2  # text y position
+
+        cv2.putText(canvas, text, (
+            text_x, text_y), font, font_scale, axis_color, thickness)
+
+    for y in range(0, height, tick_spacing):
+        py = y
+        cv2.line(canvas, ((margin - tick_size), py), (
+            margin, py), axis_color, 1)
+
+        text = str(y)
+        text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+        text_x = margin - tick_size - text_size[0] - 2
+        text_y = py + text_size[1] // 2
+
+        cv2.putText(canvas, text, (
+            text_x, text_y), font, font_scale, axis_color, thickness)
+
+
+@lru_cache(maxsize=16)
+def axes_overlay(
+        height: int,
+        width: int,
+        dtype: str = "|u1",
+        **style
+        ) -> tuple[np.ndarray, tuple[np.ndarray, np.ndarray] | None]:
+    """Renders the overlay drawn around an image of the given size. Results \
+are kept in a small LRU cache keyed by size, dtype and style.
+
+Parameters:
+    height (int): Image height.
+    width (int): Image width.
+    dtype (str): Canvas dtype, as returned by `np.dtype(...).str`.
+    **style: Overlay options forwarded to `draw_overlay`.
+
+Returns:
+    tuple: Read-only canvas (H+margin, W+margin) with the overlay on a \
+white background, and the (rows, cols) indices of the overlay pixels \
+that fall inside the image area, relative to it. The indices are None \
+when some of these pixels are blended with the image (anti-aliased text), \
+in which case the overlay must be drawn again on every image.
+    """
+    if height < 1 or width < 1:
+        raise ValueError("Image too small for drawing axes")
+
+    margin = style.get("margin", MARGIN)
+    shape = (height + margin, width + margin)
+    canvas = np.ones(shape, dtype=np.dtype(dtype)) * 255
+    draw_overlay(canvas, height, width, **style)
+
+    # Drawing again on a grey background tells the pixels covered by the
+    # overlay (changed on either canvas) and whether they are opaque (same
+    # value whatever the background).
+    grey = np.ones(shape, dtype=np.dtype(dtype)) * 128
+    draw_overlay(grey, height, width, **style)
+
+    white_area = canvas[:height, margin:]
+    grey_area = grey[:height, margin:]
+    covered = (white_area != 255) | (grey_area != 128)
+    inside = None
+    if np.array_equal(white_area[covered], grey_area[covered]):
+        inside = np.nonzero(covered)
+        for index in inside:
+            index.flags.writeable = False
+
+    canvas.flags.writeable = False
+    return canvas, inside
+
+
+def blit_axes(img: np.ndarray, out: np.ndarray = None, **style) -> np.ndarray:
+    """Copies an image into a canvas with axes drawn outside it, using the \
+cached overlay for its size.
+
+Parameters:
+    img (np.ndarray): Input grayscale image (H, W) or (H, W, 1).
+    out (np.ndarray): Optional canvas returned by a previous call for an \
+image of the same size, dtype and style. Only the image area is rewritten.
+    **style: Overlay options forwarded to `draw_overlay`.
+
+Returns:
+    np.ndarray: Image with axes drawn outside (canvas of size \
+H+margin x W+margin).
+    """
+    height, width = img.shape[:2]
+
+    if height < 1 or width < 1:
+        raise ValueError("Image too small for drawing axes")
+
+    if img.ndim == 3 and img.shape[2] == 1:
+        img = img.squeeze(axis=2)
+
+    canvas, inside = axes_overlay(height, width, img.dtype.str, **style)
+    margin = style.get("margin", MARGIN)
+
+    if out is None:
+        out = canvas.copy()
+    elif out.shape != canvas.shape or out.dtype != canvas.dtype:
+        raise ValueError("Output canvas does not match the image")
+
+    out[:height, margin:] = img
+    if inside is None:
+        np.copyto(out[height:], canvas[height:])
+        np.copyto(out[:height, :margin], canvas[:height, :margin])
+        draw_overlay(out, height, width, **style)
+    else:
+        rows, cols = inside
+        out[rows, cols + margin] = canvas[rows, cols + margin]
+    return out
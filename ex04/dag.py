@@ -0,0 +1,252 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from time import perf_counter
+import os
+import sys
+import numpy as np
+from PIL import Image
+from rotate import cut, draw_axes_outside, rgb_to_gray, transpose
+
+
+def decode(path: str) -> np.ndarray:
+    """Decodes a JPEG file as an (H, W, RGB) array. Same checks as \
+ft_load, without printing the pixels.
+
+Parameters:
+    path (str): The JPEG file.
+
+Returns:
+    np.ndarray: The image.
+    """
+    if not path.lower().endswith((".jpg", ".jpeg")):
+        raise TypeError("The file is not a JPEG or JPG extension")
+    with Image.open(path) as img:
+        if img.format not in ("JPEG", "JPG"):
+            raise ValueError("The file is not a JPEG or JPG image")
+        return np.array(img.convert("RGB"))
+
+
+class Node:
+    """One stage of a Graph: an operation applied to the results of other \
+nodes.
+
+Parameters:
+    op (str): Operation name. Nodes with the same name, inputs and params \
+are the same computation.
+    func (Callable): Called as func(*input results, **params).
+    inputs (tuple[Node]): Nodes whose results are the positional arguments.
+    params (dict): Keyword arguments of func.
+    """
+
+    def __init__(self, op: str, func, inputs: tuple, params: dict):
+        self.op = op
+        self.func = func
+        self.inputs = inputs
+        self.params = params
+        self.key = (op, tuple(node.key for node in inputs),
+                    tuple(sorted(params.items())))
+
+    def __repr__(self) -> str:
+        params = "".join(f", {k}={v!r}" for k, v in sorted(
+            self.params.items()))
+        inputs = ", ".join(node.op for node in self.inputs)
+        return f"Node({self.op}({inputs}{params}))"
+
+
+class Graph:
+    """Declares image stages as a DAG and runs them once each.
+
+Declaring a stage that already exists (same operation, inputs and \
+params) returns the existing node, so jobs sharing a prefix, such as the \
+zoom.py and rotate.py programs which both decode, crop and convert the \
+same file, share its nodes. `run` computes the nodes the requested \
+outputs depend on, the independent ones concurrently on a thread pool, \
+and drops each intermediate result once its last consumer has run.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self.shared = 0
+        self.report = None
+
+    def add(self, op: str, func, *inputs: Node, **params) -> Node:
+        """Declares a stage, or returns the identical stage already declared.
+
+Parameters:
+    op (str): Operation name, e.g. "invert".
+    func (Callable): The operation, called as func(*inputs, **params).
+    *inputs (Node): Nodes whose results are passed to func.
+    **params: Keyword arguments of func (hashable values).
+
+Returns:
+    Node: The node.
+        """
+        node = Node(op, func, inputs, params)
+        if node.key in self._nodes:
+            self.shared += 1
+            return self._nodes[node.key]
+        self._nodes[node.key] = node
+        return node
+
+    def load(self, path: str) -> Node:
+        """Declares the decoding of a JPEG file."""
+        return self.add("load", decode, path=os.path.abspath(path))
+
+    def crop(self, node: Node, size: int) -> Node:
+        """Declares the square crop of `zoom` and `cut`."""
+        return self.add("crop", cut, node, size=size)
+
+    def gray(self, node: Node) -> Node:
+        """Declares the (H, W, 1) grayscale conversion of `rgb_to_gray`."""
+        return self.add("gray", rgb_to_gray, node)
+
+    def squeeze(self, node: Node) -> Node:
+        """Declares the removal of the channel axis of a grayscale image."""
+        return self.add("squeeze", np.squeeze, node)
+
+    def transpose(self, node: Node) -> Node:
+        """Declares the transposition of an image."""
+        return self.add("transpose", transpose, node)
+
+    def axes(self, node: Node) -> Node:
+        """Declares the rendering of the axes around an image."""
+        return self.add("axes", draw_axes_outside, node)
+
+    def plan(self, outputs) -> list:
+        """Returns the nodes needed by the outputs, each once, inputs first.
+
+Parameters:
+    outputs (Iterable[Node]): The requested nodes.
+
+Returns:
+    list[Node]: The nodes in a topological order.
+        """
+        order, seen = [], set()
+
+        def visit(node: Node):
+            if node.key in seen:
+                return
+            seen.add(node.key)
+            for source in node.inputs:
+                visit(source)
+            order.append(node)
+
+        for node in outputs:
+            visit(node)
+        return order
+
+    def run(self, outputs: dict, workers: int = None) -> dict:
+        """Computes the requested nodes.
+
+Parameters:
+    outputs (dict): Requested nodes, by result name.
+    workers (int): Number of threads (defaults to the CPU count).
+
+Returns:
+    dict: The results, by result name. The run statistics are kept in \
+`self.report`.
+        """
+        order = self.plan(outputs.values())
+        wanted = {node.key for node in outputs.values()}
+        waiting = {node.key: len({s.key for s in node.inputs})
+                   for node in order}
+        consumers = {node.key: set() for node in order}
+        for node in order:
+            for source in node.inputs:
+                consumers[source.key].add(node.key)
+        remaining = {key: len(keys) for key, keys in consumers.items()}
+
+        results = {}
+        live = peak_live = 0
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            futures = {}
+
+            def submit(node: Node):
+                args = [results[source.key] for source in node.inputs]
+                futures[pool.submit(node.func, *args, **node.params)] = node
+
+            for node in order:
+                if waiting[node.key] == 0:
+                    submit(node)
+            try:
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        node = futures.pop(future)
+                        results[node.key] = future.result()
+                        live += 1
+                        peak_live = max(peak_live, live)
+
+                        for key in consumers[node.key]:
+                            waiting[key] -= 1
+                            if waiting[key] == 0:
+                                submit(self._nodes[key])
+                        for source in {s.key for s in node.inputs}:
+                            remaining[source] -= 1
+                            if remaining[source] == 0 and source not in wanted:
+                                del results[source]
+                                live -= 1
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        self.report = {
+            "declared": len(self._nodes) + self.shared,
+            "computed": len(order),
+            "shared": self.shared,
+            "peak_live_results": peak_live,
+            "seconds": perf_counter() - start,
+        }
+        return {name: results[node.key] for name, node in outputs.items()}
+
+
+def program_outputs(graph: Graph, path: str, size: int = 400) -> dict:
+    """Declares the outputs of the zoom.py and rotate.py programs for one \
+file. Both start with the same decode, crop and grayscale conversion.
+
+Parameters:
+    graph (Graph): The graph.
+    path (str): The JPEG file.
+    size (int): Crop size.
+
+Returns:
+    dict: {"zoom": node, "rotate": node}.
+    """
+    zoom_gray = graph.gray(graph.crop(graph.load(path), size))
+    rotate_gray = graph.squeeze(graph.gray(graph.crop(graph.load(path), size)))
+    return {
+        "zoom": graph.axes(zoom_gray),
+        "rotate": graph.axes(graph.transpose(rotate_gray)),
+    }
+
+
+def main():
+    """Runs the zoom and rotate programs on the file given on the command \
+line as one graph, and prints what was shared.
+
+Parameters:
+    None
+
+Returns:
+    None
+    """
+    try:
+        if len(sys.argv) != 2:
+            raise AssertionError("usage: python dag.py <image.jpg>")
+        graph = Graph()
+        results = graph.run(program_outputs(graph, sys.argv[1]))
+        for name, result in results.items():
+            print(f"{name}: {result.shape}")
+        report = graph.report
+        print(f"{report['computed']} stages computed for "
+              f"{report['declared']} declared ({report['shared']} shared) "
+              f"in {report['seconds'] * 1e3:.1f} ms")
+
+    except Exception as e:
+        print(f"Exception: DAG Program: {e}")
+    finally:
+        print("\nProgram ended...")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,35 @@
 from load_image import ft_load
+from axes_overlay import blit_axes
+import rotate_kernels
+import transform
 import numpy as np
 import cv2
 
 
+def cut_box(height: int, width: int, size: int) -> tuple[int, int, int]:
+    """Computes the window used by `cut` for an image of the given size.
+
+Parameters:
+    height (int): Image height.
+    width (int): Image width.
+    size (int): Desired size of the square crop.
+
+Returns:
+    tuple[int, int, int]: (start_h, start_w, crop_size) of the window.
+    """
+    zoom_size = min(size, height, width)
+
+    if height < 1 or width < 1:
+        raise ValueError("Image dimensions are too small for zoom.")
+
+    offset_w = 135
+    offset_h = 85
+
+    start_h = max(0, (height - zoom_size) // 2 - offset_h)
+    start_w = max(0, (width - zoom_size) // 2 + offset_w)
+    return start_h, start_w, zoom_size
+
+
 def cut(img: np.ndarray, size: int) -> np.ndarray:
     """
 Crops a square region from the input image with optional offsets.
@@ -23,16 +50,7 @@ Returns
 dimensions.
     """
     height, width = img.shape[:2]
-    zoom_size = min(size, height, width)
-
-    if height < 1 or width < 1:
-        raise ValueError("Image dimensions are too small for zoom.")
-
-    offset_w = 135
-    offset_h = 85
-
-    start_h = max(0, (height - zoom_size) // 2 - offset_h)
-    start_w = max(0, (width - zoom_size) // 2 + offset_w)
+    start_h, start_w, zoom_size = cut_box(height, width, size)
     end_h = start_h + zoom_size
     end_w = start_w + zoom_size
 
@@ -55,6 +73,8 @@ grayscale.
         raise ValueError("Invalid image dimensions")
 
     if len(img.shape) == 3 and img.shape[2] == 3:
+        if rotate_kernels.jit_enabled() and img.dtype == np.uint8:
+            return rotate_kernels.rgb_to_gray(img)
         gray = np.dot(img[..., :3], [0.2989, 0.5870, 0.1140])
         gray = np.array(gray, dtype=np.uint8)
         gray = gray[..., np.newaxis]
@@ -63,88 +83,37 @@ grayscale.
 
 
 def transpose(img: np.ndarray) -> np.ndarray:
-    """Transposes a 2D image array (flips rows and columns).
+    """Transposes an image array (flips rows and columns).
 
 Parameters
     img : np.ndarray
-        Input image as a 2D NumPy array.
+        Input image as a 2D NumPy array, or a 3D (H, W, C) array whose \
+channels are kept.
 
 Returns
     np.ndarray
-        Transposed image as a 2D NumPy array.
+        Transposed image as a contiguous NumPy array of shape (W, H) or \
+(W, H, C).
     """
-    if img is None or img.size == 0:
-        raise ValueError("Invalid image format to transpose")
+    return transform.transpose(img)
 
-    height, width = img.shape[:2]
-    transposed = np.zeros((width, height), dtype=img.dtype)
-    for i in range(height):
-        for j in range(width):
-            transposed[j][i] = img[i][j]
-    return transposed
 
-
-def draw_axes_outside(img: np.ndarray):
+def draw_axes_outside(img: np.ndarray, out: np.ndarray = None):
     """Draws X and Y axes outside the image with ticks and numbers.
 
+The margin, axes, ticks and labels are rendered once per image size and \
+cached, so each call only copies the image into the canvas.
+
 Parameters:
     img (np.ndarray): Input grayscale image (H, W) or (H, W, 1).
+    out (np.ndarray): Optional canvas returned by a previous call for an \
+image of the same size, reused instead of allocating a new one.
 
 Returns:
     np.ndarray: Image with axes drawn outside (canvas of size \
 H+margin x W+margin).
     """
-    height, width = img.shape[:2]
-    margin = 40
-
-    if height < 1 or width < 1:
-        raise ValueError("Image too small for drawing axes")
-
-    if img.ndim == 3 and img.shape[2] == 1:
-        img = img.squeeze()
-
-    canvas = np.ones((height + margin, width + margin), dtype=img.dtype) * 255
-    canvas[:height, margin:] = img
-
-    axis_color = 0
-    tick_size = 5
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 0.4
-    thickness = 1
-
-    cv2.line(canvas, (margin, height), (
-        width + margin - 1, height), axis_color, 1)  # x axis
-    cv2.line(canvas, (margin, 0), (
-        margin, height - 1), axis_color, 1)  # y axis
-
-    for x in range(0, width, 50):
-        px = margin + x
-        cv2.line(canvas, (px, height), (
-            px, height + tick_size), axis_color, 1)
-
-        text = str(x)
-        text_size = cv2.getTextSize(
-            text, font, font_scale, thickness)[0]  # ex.: (w 18px, h 8px)
-        text_x = px - text_size[0] // 2  # text x position (centralized)
-        text_y = height + tick_size + text_size[1] + 2  # text y position
-
-        cv2.putText(canvas, text, (
-            text_x, text_y), font, font_scale, axis_color, thickness)
-
-    for y in range(0, height, 50):
-        py = y
-        cv2.line(canvas, ((margin - tick_size), py), (
-            margin, py), axis_color, 1)
-
-        text = str(y)
-        text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
-        text_x = margin - tick_size - text_size[0] - 2
-        text_y = py + text_size[1] // 2
-
-        cv2.putText(canvas, text, (
-            text_x, text_y), font, font_scale, axis_color, thickness)
-
-    return canvas
+    return blit_axes(img, out)
 
 
 def show_image(img: np.ndarray):
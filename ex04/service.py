@@ -0,0 +1,470 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+import argparse
+import asyncio
+import base64
+import io
+import ipaddress
+import json
+import os
+import socket
+import numpy as np
+from PIL import Image
+from dag import decode
+from memo import ArrayCache, chain_key
+from rotate import cut, draw_axes_outside, rgb_to_gray, transpose
+import transform
+import warp
+
+try:
+    import pimp_image  # ex05, when it is on the import path
+except ImportError:
+    pimp_image = None
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+LATENCY_WINDOW = 1000
+MAX_LINE = 1 << 20
+
+
+def _filter(name: str):
+    """Wraps a pimp_image filter, raising instead of returning None."""
+    def run(img: np.ndarray) -> np.ndarray:
+        result = getattr(pimp_image, f"ft_{name}")(img)
+        if result is None:
+            raise ValueError(f"Filter '{name}' failed")
+        return result
+    return run
+
+
+OPS = {
+    "crop": cut,
+    "gray": rgb_to_gray,
+    "squeeze": np.squeeze,
+    "transpose": transpose,
+    "axes": draw_axes_outside,
+    "rotate": warp.rotate,
+    "rotate90": transform.rotate90,
+    "flip_horizontal": transform.flip_horizontal,
+    "flip_vertical": transform.flip_vertical,
+}
+# The pimp_image filters are served when ex05 is on the import path.
+if pimp_image is not None:
+    OPS.update({name: _filter(name) for name in pimp_image.FILTERS})
+
+
+def parse_ops(ops: list) -> tuple:
+    """Normalizes an op chain such as ["crop", 400] steps or "gray" names \
+into a tuple of (name, *args) tuples.
+
+Parameters:
+    ops (list): Steps, each a name or a [name, *args] list.
+
+Returns:
+    tuple: The normalized steps.
+    """
+    if not isinstance(ops, list):
+        raise ValueError("ops must be a list")
+    steps = []
+    for step in ops:
+        step = (step,) if isinstance(step, str) else tuple(step)
+        if not step or step[0] not in OPS:
+            raise ValueError(f"Unknown op '{step[0] if step else ''}'")
+        for arg in step[1:]:
+            if not isinstance(arg, (int, float, str, bool)):
+                raise ValueError(f"Invalid argument {arg!r} of '{step[0]}'")
+        steps.append(step)
+    return tuple(steps)
+
+
+def encode_array(array: np.ndarray) -> str:
+    """Serializes an array as base64 .npy bytes."""
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def decode_array(data: str) -> np.ndarray:
+    """Reads an array serialized by `encode_array`."""
+    return np.load(io.BytesIO(base64.b64decode(data)))
+
+
+class Metrics:
+    """Request counters and the latencies of the last requests."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.start = perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.computed = 0
+        self.latencies = deque(maxlen=window)
+        self.finished = deque(maxlen=window)
+
+    def record(self, seconds: float, ok: bool):
+        self.requests += 1
+        self.errors += not ok
+        self.latencies.append(seconds)
+        self.finished.append(perf_counter())
+
+    def report(self) -> dict:
+        """Returns the counters, latency percentiles (ms) and throughput."""
+        uptime = perf_counter() - self.start
+        latencies = np.array(self.latencies) * 1e3
+        p50, p95, p99 = (np.percentile(latencies, [50, 95, 99])
+                         if len(latencies) else (0.0, 0.0, 0.0))
+        span = (self.finished[-1] - self.finished[0]
+                if len(self.finished) > 1 else 0.0)
+        return {
+            "uptime_s": uptime,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+            "computed": self.computed,
+            "latency_ms_p50": float(p50),
+            "latency_ms_p95": float(p95),
+            "latency_ms_p99": float(p99),
+            "requests_per_s": self.requests / uptime if uptime else 0.0,
+            "recent_requests_per_s": (len(self.finished) - 1) / span
+            if span else 0.0,
+        }
+
+
+def is_loopback(host: str) -> bool:
+    """Checks if a host name or address only reaches this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def confine(root: str, name: str) -> str:
+    """Resolves a file name inside a directory, refusing absolute paths \
+and paths leaving the directory.
+
+Parameters:
+    root (str): The directory, as returned by os.path.realpath.
+    name (str): Relative file name, e.g. "animal/gray.png".
+
+Returns:
+    str: The absolute path of the file.
+    """
+    if not isinstance(name, str) or os.path.isabs(name) \
+            or ".." in name.replace("\\", "/").split("/"):
+        raise PermissionError(f"Invalid path '{name}'")
+    # realpath follows symbolic links that would lead outside.
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([path, root]) != root or path == root:
+        raise PermissionError(f"Invalid path '{name}'")
+    return path
+
+
+class ImageService:
+    """Long-running image processing server speaking newline-delimited \
+JSON over a loopback TCP port or a Unix socket. Other hosts are refused.
+
+A request {"id": 1, "path": "animal.jpeg", "ops": [["crop", 400], "gray", \
+"squeeze", "transpose"]} returns {"id": 1, "ok": true, "shape": [...], \
+"dtype": "uint8"}, plus "data" (base64 .npy) when "return" is true, or \
+saves the result when "output" is a file name (.npy, .jpg, .png) \
+relative to the output directory of the service. \
+{"cmd": "metrics"} returns the metrics and {"cmd": "ping"} checks the \
+server is up.
+
+The decoded image and every prefix of an op chain are kept in a warm \
+cache keyed by the file content, so a later chain starting the same way \
+resumes from the longest cached prefix. Identical requests arriving while \
+one is being computed wait for that computation instead of starting \
+their own. CPU work runs on a thread pool (NumPy and OpenCV release the \
+GIL) sharing the cache.
+
+Parameters:
+    workers (int): Threads of the executor (defaults to the CPU count).
+    max_pending (int): Requests being computed or waiting for a worker; \
+beyond it requests are rejected with a "busy" error.
+    cache_bytes (int): Memory budget of the warm cache.
+    output_dir (str): Directory "output" files are written to. Without \
+it, requests with an "output" field are rejected; absolute paths and \
+paths leaving the directory always are.
+    input_dir (str): Directory the "path" of the requests is relative to, \
+with the same restrictions. Without it, any file readable by the service \
+can be requested by a local client.
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = 64,
+                 cache_bytes: int = 512 * 1024 * 1024,
+                 output_dir: str = None, input_dir: str = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.output_dir = output_dir and os.path.realpath(output_dir)
+        self.input_dir = input_dir and os.path.realpath(input_dir)
+        self.cache = ArrayCache(cache_bytes)
+        self.metrics = Metrics()
+        self.pending = 0
+        self._inflight = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._server = None
+
+    def compute(self, path: str, steps: tuple) -> np.ndarray:
+        """Runs an op chain on a file, resuming from the longest cached \
+prefix and caching every intermediate result. Runs on a worker thread.
+
+Parameters:
+    path (str): The JPEG file.
+    steps (tuple): Steps returned by `parse_ops`.
+
+Returns:
+    np.ndarray: The read-only result.
+        """
+        keys = [chain_key(path, *steps[:i]) for i in range(len(steps) + 1)]
+        for done in range(len(steps), -1, -1):
+            result = self.cache.get(keys[done])
+            if result is not None:
+                break
+        else:
+            done = 0
+            result = self.cache.put(keys[0], decode(path))
+
+        for i in range(done, len(steps)):
+            name, *args = steps[i]
+            result = self.cache.put(keys[i + 1], OPS[name](result, *args))
+        return result
+
+    def output_path(self, name: str) -> str:
+        """Resolves the "output" field of a request inside the output \
+directory.
+
+Parameters:
+    name (str): Relative file name, e.g. "animal/gray.png".
+
+Returns:
+    str: The absolute path of the file.
+        """
+        if self.output_dir is None:
+            raise PermissionError("Outputs are disabled on this service")
+        return confine(self.output_dir, name)
+
+    def input_path(self, name: str) -> str:
+        """Resolves the "path" field of a request, inside the input \
+directory when there is one.
+
+Parameters:
+    name (str): The JPEG file.
+
+Returns:
+    str: The absolute path of the file.
+        """
+        if self.input_dir is None:
+            return os.path.abspath(name)
+        return confine(self.input_dir, name)
+
+    async def _result(self, path: str, steps: tuple) -> np.ndarray:
+        """Computes a chain, or joins the identical computation in flight.
+        """
+        loop = asyncio.get_running_loop()
+        key = await loop.run_in_executor(
+            self._pool, chain_key, path, *steps)
+        if key in self._inflight:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(self._inflight[key])
+
+        future = loop.run_in_executor(self._pool, self.compute, path, steps)
+        self._inflight[key] = future
+        self.metrics.computed += 1
+        try:
+            return await future
+        finally:
+            del self._inflight[key]
+
+    async def process(self, request: dict) -> dict:
+        """Answers one request."""
+        response = {"id": request.get("id")}
+        command = request.get("cmd", "process")
+        if command == "ping":
+            return {**response, "ok": True}
+        if command == "metrics":
+            return {**response, "ok": True, "metrics": self.report()}
+        if command != "process":
+            return {**response, "ok": False,
+                    "error": f"Unknown command '{command}'"}
+
+        if self.pending >= self.max_pending:
+            self.metrics.rejected += 1
+            return {**response, "ok": False, "error": "busy"}
+
+        self.pending += 1
+        start = perf_counter()
+        try:
+            path = self.input_path(request["path"])
+            steps = parse_ops(request.get("ops", []))
+            output = request.get("output")
+            if output:
+                output = self.output_path(output)
+            result = await self._result(path, steps)
+            response.update(ok=True, shape=list(result.shape),
+                            dtype=str(result.dtype))
+            if output:
+                await asyncio.get_running_loop().run_in_executor(
+                    self._pool, save_result, result, output)
+            if request.get("return"):
+                response["data"] = encode_array(result)
+        except KeyError as e:
+            response.update(ok=False, error=f"Missing field {e}")
+        except Exception as e:
+            response.update(ok=False, error=str(e) or type(e).__name__)
+        finally:
+            self.pending -= 1
+        self.metrics.record(perf_counter() - start, response["ok"])
+        return response
+
+    async def _answer(self, line: bytes, writer: asyncio.StreamWriter,
+                      lock: asyncio.Lock):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("A request must be a JSON object")
+            response = await self.process(request)
+        except ValueError as e:
+            response = {"id": None, "ok": False, "error": str(e)}
+        async with lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        """Serves one connection. Its requests are answered concurrently, \
+in completion order (match them by "id")."""
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._answer(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def report(self) -> dict:
+        """Returns the service metrics, including the cache statistics."""
+        return {**self.metrics.report(), "pending": self.pending,
+                "inflight": len(self._inflight), "cache": self.cache.stats()}
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    unix_path: str = None):
+        """Starts listening on a loopback TCP port, or on a Unix socket \
+when unix_path is given."""
+        if unix_path is None and not is_loopback(host):
+            raise ValueError(f"Refusing to listen on '{host}': the service "
+                             "only serves loopback hosts")
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(
+                self.handle, unix_path, limit=MAX_LINE)
+        else:
+            self._server = await asyncio.start_server(
+                self.handle, host, port, limit=MAX_LINE)
+        return self._server
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    unix_path: str = None):
+        """Starts the server and serves until cancelled."""
+        server = await self.start(host, port, unix_path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops the server and the worker threads."""
+        if self._server is not None:
+            self._server.close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def save_result(result: np.ndarray, path: str):
+    """Saves a result as .npy, or as an image for any other extension."""
+    if path.lower().endswith(".npy"):
+        np.save(path, result)
+    else:
+        Image.fromarray(np.ascontiguousarray(result.squeeze())).save(path)
+
+
+def send_request(request: dict, host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT, unix_path: str = None) -> dict:
+    """Sends one request to a running ImageService and waits for the \
+answer (blocking client for scripts and other services).
+
+Parameters:
+    request (dict): The request, see ImageService.
+    host (str): Server host.
+    port (int): Server port.
+    unix_path (str): Unix socket of the server, instead of host and port.
+
+Returns:
+    dict: The response. Use `decode_array` on its "data" field.
+    """
+    if unix_path is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(unix_path)
+    else:
+        connection = socket.create_connection((host, port))
+    with connection, connection.makefile("rwb") as stream:
+        stream.write(json.dumps(request).encode() + b"\n")
+        stream.flush()
+        return json.loads(stream.readline())
+
+
+def main():
+    """Runs the service until interrupted.
+
+Parameters:
+    None
+
+Returns:
+    None
+    """
+    parser = argparse.ArgumentParser(
+        description="Serves the image pipeline over a local socket.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="Unix socket path")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--cache-mb", type=int, default=512)
+    parser.add_argument("--output-dir",
+                        help="directory of the \"output\" files "
+                             "(outputs are disabled without it)")
+    parser.add_argument("--input-dir",
+                        help="directory the requested images are read from")
+    args = parser.parse_args()
+
+    try:
+        service = ImageService(args.workers, args.max_pending,
+                               args.cache_mb * 1024 * 1024, args.output_dir,
+                               args.input_dir)
+        where = args.unix or f"{args.host}:{args.port}"
+        print(f"Serving on {where} ({service.workers} workers)")
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+
+    except KeyboardInterrupt:
+        print("\nService Program: Operation cancelled by user (Ctrl+C).")
+    except Exception as e:
+        print(f"Exception: Service Program: {e}")
+    finally:
+        print("\nProgram ended...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+from collections import deque
+from threading import Event, Lock, Thread
+from time import perf_counter
+import os
+import queue
+import sys
+import numpy as np
+import cv2
+from axes_overlay import MARGIN
+from rotate import cut, rgb_to_gray, transpose, draw_axes_outside
+
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg")
+_END = object()
+
+
+class BufferPool:
+    """Free list of output buffers recycled between frames.
+
+Parameters:
+    size (int): Maximum number of buffers kept for reuse.
+    """
+
+    def __init__(self, size: int):
+        self._free = deque(maxlen=size)
+        self._lock = Lock()
+
+    def acquire(self) -> np.ndarray | None:
+        """Returns a free buffer, or None if the stage must allocate one."""
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def release(self, buffer: np.ndarray):
+        """Gives a buffer back once no stage reads it anymore."""
+        with self._lock:
+            self._free.append(buffer)
+
+
+class Frame:
+    """Frame travelling through the pipeline.
+
+Parameters:
+    index (int): Position of the frame in the stream.
+    data (np.ndarray): Current pixel data.
+    """
+
+    def __init__(self, index: int, data: np.ndarray):
+        self.index = index
+        self.data = data
+        self.buffers = []  # (pool, buffer) pairs still referenced by data
+
+    def release(self):
+        """Returns the pooled buffers held by the frame."""
+        for pool, buffer in self.buffers:
+            pool.release(buffer)
+        self.buffers = []
+
+
+class StageStats:
+    """Per-frame latencies of a stage, in seconds."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies = []
+
+    def report(self) -> dict:
+        """Summarizes the latencies in milliseconds."""
+        if not self.latencies:
+            return {"frames": 0}
+        ms = np.array(self.latencies) * 1000
+        return {
+            "frames": len(ms),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "max_ms": float(ms.max()),
+        }
+
+
+class Stage:
+    """Step of the pipeline run on its own thread.
+
+Parameters:
+    name (str): Stage name used in the report.
+    func (Callable[[np.ndarray, np.ndarray | None], np.ndarray]): Function \
+computing the stage output from the input pixels and a recycled output \
+buffer (None when no buffer is free yet).
+    buffers (int): Number of output buffers kept for reuse (0 to disable).
+    """
+
+    def __init__(self, name: str, func, buffers: int = 0):
+        self.name = name
+        self.func = func
+        self.pool = BufferPool(buffers) if buffers > 0 else None
+        self.stats = StageStats(name)
+
+    def process(self, frame: Frame) -> Frame:
+        """Runs the stage on a frame and recycles the buffers it frees."""
+        out = self.pool.acquire() if self.pool is not None else None
+        start = perf_counter()
+        result = self.func(frame.data, out)
+        self.stats.latencies.append(perf_counter() - start)
+
+        if not np.shares_memory(result, frame.data):
+            frame.release()
+        if out is not None and out is not result:
+            self.pool.release(out)
+        if self.pool is not None and not any(
+                result is buffer for _, buffer in frame.buffers):
+            frame.buffers.append((self.pool, result))
+        frame.data = result
+        return frame
+
+
+class StreamPipeline:
+    """Runs zoom -> gray -> transpose -> axes on a stream of frames, one \
+thread per stage, connected by bounded queues for backpressure.
+
+Parameters:
+    source (int | str): Camera index, video file or directory of JPEGs.
+    output (str | None): Output video file (by extension) or directory of \
+JPEGs, or None to discard the frames.
+    size (int): Size of the square crop.
+    queue_size (int): Capacity of the queues between stages.
+    fps (float): Frame rate of the output video when the source has none.
+    """
+
+    def __init__(self, source: int | str, output: str | None = None,
+                 size: int = 400, queue_size: int = 4, fps: float = 30.0):
+        self.source = source
+        self.output = output
+        self.size = size
+        self.queue_size = queue_size
+        self.fps = fps
+        self.read_stats = StageStats("read")
+        self.write_stats = StageStats("write")
+        self.stages = [
+            Stage("cut", self._cut),
+            Stage("gray", self._gray),
+            Stage("transpose", self._transpose),
+            Stage("axes", self._axes, buffers=queue_size + 2),
+        ]
+        self.frames = 0
+        self.elapsed = 0.0
+        self._stop = Event()
+        self._errors = []
+        self._read_pool = BufferPool(queue_size + 2)
+        self._from_dir = isinstance(source, str) and os.path.isdir(source)
+
+    def _cut(self, img: np.ndarray, out) -> np.ndarray:
+        # OpenCV decodes BGR: the reversed view gives RGB without a copy.
+        return cut(img, self.size)[..., ::-1]
+
+    @staticmethod
+    def _gray(img: np.ndarray, out) -> np.ndarray:
+        return rgb_to_gray(img).squeeze(axis=2)
+
+    @staticmethod
+    def _transpose(img: np.ndarray, out) -> np.ndarray:
+        return transpose(img)
+
+    @staticmethod
+    def _axes(img: np.ndarray, out) -> np.ndarray:
+        expected = (img.shape[0] + MARGIN, img.shape[1] + MARGIN)
+        if out is not None and out.shape != expected:
+            out = None
+        return draw_axes_outside(img, out)
+
+    def _put(self, q: queue.Queue, item):
+        """Blocks on a full queue until there is room or the pipeline \
+stops."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _frames(self):
+        """Yields the frames of the source (BGR, as decoded by OpenCV)."""
+        if self._from_dir:
+            names = sorted(
+                name for name in os.listdir(self.source)
+                if name.lower().endswith(IMAGE_EXTENSIONS))
+            for name in names:
+                img = cv2.imread(os.path.join(self.source, name))
+                if img is None:
+                    raise ValueError(f"Cannot decode frame '{name}'")
+                yield img
+            return
+
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            raise FileNotFoundError(f"Cannot open stream: {self.source}")
+        source_fps = capture.get(cv2.CAP_PROP_FPS)
+        if source_fps > 0:
+            self.fps = source_fps
+        try:
+            while not self._stop.is_set():
+                buffer = self._read_pool.acquire()
+                ok, img = capture.read(buffer)
+                if not ok:
+                    break
+                if buffer is not None and img is not buffer:
+                    self._read_pool.release(buffer)
+                yield img
+        finally:
+            capture.release()
+
+    def _read(self, out_q: queue.Queue):
+        try:
+            frames = self._frames()
+            index = 0
+            while True:
+                start = perf_counter()
+                img = next(frames, None)
+                if img is None:
+                    break
+                self.read_stats.latencies.append(perf_counter() - start)
+                frame = Frame(index, img)
+                if not self._from_dir:
+                    frame.buffers.append((self._read_pool, img))
+                self._put(out_q, frame)
+                index += 1
+        except Exception as e:
+            self._fail(e)
+        self._put(out_q, _END)
+
+    def _run_stage(self, stage: Stage, in_q: queue.Queue,
+                   out_q: queue.Queue):
+        try:
+            while True:
+                frame = self._get(in_q)
+                if frame is _END:
+                    break
+                self._put(out_q, stage.process(frame))
+        except Exception as e:
+            self._fail(e)
+        self._put(out_q, _END)
+
+    def _write(self, in_q: queue.Queue):
+        writer = None
+        try:
+            if self.output is not None and not self.output.lower().endswith(
+                    VIDEO_EXTENSIONS):
+                os.makedirs(self.output, exist_ok=True)
+            while True:
+                frame = self._get(in_q)
+                if frame is _END:
+                    break
+                start = perf_counter()
+                img = frame.data
+                if self.output is None:
+                    pass
+                elif self.output.lower().endswith(VIDEO_EXTENSIONS):
+                    if writer is None:
+                        writer = cv2.VideoWriter(
+                            self.output, cv2.VideoWriter_fourcc(*"mp4v"),
+                            self.fps, (img.shape[1], img.shape[0]),
+                            isColor=False)
+                    writer.write(img)
+                else:
+                    cv2.imwrite(os.path.join(
+                        self.output, f"frame_{frame.index:06d}.jpg"), img)
+                self.write_stats.latencies.append(perf_counter() - start)
+                frame.release()
+                self.frames += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            if writer is not None:
+                writer.release()
+
+    def _fail(self, error: Exception):
+        self._errors.append(error)
+        self._stop.set()
+
+    def run(self) -> dict:
+        """Processes the whole stream.
+
+Returns:
+    dict: Latency report, see `report`.
+    """
+        queues = [queue.Queue(maxsize=self.queue_size)
+                  for _ in range(len(self.stages) + 1)]
+        threads = [Thread(target=self._read, args=(queues[0],))]
+        for i, stage in enumerate(self.stages):
+            threads.append(Thread(
+                target=self._run_stage,
+                args=(stage, queues[i], queues[i + 1])))
+        threads.append(Thread(target=self._write, args=(queues[-1],)))
+
+        start = perf_counter()
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.1)
+        except KeyboardInterrupt:
+            self._stop.set()
+            raise
+        finally:
+            self.elapsed = perf_counter() - start
+
+        if self._errors:
+            raise self._errors[0]
+        return self.report()
+
+    def report(self) -> dict:
+        """Returns the per-stage latencies and the overall throughput."""
+        stats = [self.read_stats] + [
+            stage.stats for stage in self.stages] + [self.write_stats]
+        return {
+            "frames": self.frames,
+            "seconds": self.elapsed,
+            "fps": self.frames / self.elapsed if self.elapsed else 0.0,
+            "stages": {s.name: s.report() for s in stats},
+        }
+
+
+def print_report(report: dict):
+    """Prints a latency report returned by `StreamPipeline.run`.
+
+Parameters:
+    report (dict): The report.
+
+Returns:
+    None
+    """
+    print(f"{report['frames']} frames in {report['seconds']:.2f}s "
+          f"({report['fps']:.1f} fps)")
+    for name, stats in report["stages"].items():
+        if stats["frames"] == 0:
+            continue
+        print(f"  {name:<10} mean {stats['mean_ms']:7.2f} ms  "
+              f"p95 {stats['p95_ms']:7.2f} ms  "
+              f"max {stats['max_ms']:7.2f} ms")
+
+
+def main():
+    """Runs the pipeline on the stream given on the command line \
+(camera index, video file or directory of JPEGs) and writes the result \
+to an optional output video or directory.
+
+Parameters:
+    None
+
+Returns:
+    None
+    """
+    try:
+        if len(sys.argv) not in [2, 3]:
+            raise AssertionError(
+                "usage: python stream.py <source> [output]")
+        source = sys.argv[1]
+        if source.isdigit():
+            source = int(source)
+        output = sys.argv[2] if len(sys.argv) == 3 else None
+
+        print_report(StreamPipeline(source, output).run())
+
+    except KeyboardInterrupt:
+        print("\nStream Program: Operation cancelled by user (Ctrl+C).")
+    except Exception as e:
+        print(f"Exception: Stream Program: {e}")
+    finally:
+        print("\nProgram ended...")
+
+
+if __name__ == "__main__":
+    main()
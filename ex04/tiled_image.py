@@ -0,0 +1,262 @@
+import numpy as np
+from rotate import cut_box, rgb_to_gray
+
+
+DEFAULT_TILE_SIZE = 512
+
+
+class TiledImage:
+    """Image stored on disk as a memory-mapped .npy file and processed \
+tile by tile.
+
+Only the tiles touched by an operation are read, and every operation \
+writes its result to a new memory-mapped file, so the memory footprint \
+stays around a few tiles whatever the size of the image.
+
+Parameters:
+    path (str): Path of the backing .npy file.
+    tile_size (int | tuple[int, int]): Tile (height, width) in pixels.
+    mode (str): Memory-map mode ("r", "r+" or "c").
+    """
+
+    def __init__(self, path: str,
+                 tile_size: int | tuple[int, int] = DEFAULT_TILE_SIZE,
+                 mode: str = "r"):
+        self.path = path
+        self.data = np.load(path, mmap_mode=mode)
+        if self.data.ndim not in [2, 3]:
+            raise ValueError("Invalid image dimensions")
+        self.tile_size = _tile_pair(tile_size)
+
+    @classmethod
+    def create(cls, path: str, shape: tuple, dtype=np.uint8,
+               tile_size: int | tuple[int, int] = DEFAULT_TILE_SIZE
+               ) -> "TiledImage":
+        """Creates an empty tiled image on disk.
+
+Parameters:
+    path (str): Path of the .npy file to create.
+    shape (tuple): (H, W) or (H, W, C) shape of the image.
+    dtype: Pixel type.
+    tile_size (int | tuple[int, int]): Tile (height, width) in pixels.
+
+Returns:
+    TiledImage: The new image, opened for writing.
+    """
+        if len(shape) not in [2, 3] or min(shape) < 1:
+            raise ValueError("Invalid image dimensions")
+        mm = np.lib.format.open_memmap(
+            path, mode="w+", dtype=dtype, shape=tuple(shape))
+        del mm
+        return cls(path, tile_size, mode="r+")
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, path: str,
+                   tile_size: int | tuple[int, int] = DEFAULT_TILE_SIZE
+                   ) -> "TiledImage":
+        """Writes an in-memory array to disk as a tiled image.
+
+Parameters:
+    array (np.ndarray): Image (H, W) or (H, W, C).
+    path (str): Path of the .npy file to create.
+    tile_size (int | tuple[int, int]): Tile (height, width) in pixels.
+
+Returns:
+    TiledImage: The new image.
+    """
+        tiled = cls.create(path, array.shape, array.dtype, tile_size)
+        for window in tiled.windows():
+            tiled.data[window] = array[window]
+        tiled.flush()
+        return tiled
+
+    @property
+    def shape(self) -> tuple:
+        return self.data.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.data.dtype
+
+    @property
+    def grid(self) -> tuple[int, int]:
+        """Number of tile rows and tile columns."""
+        tile_h, tile_w = self.tile_size
+        height, width = self.shape[:2]
+        return -(-height // tile_h), -(-width // tile_w)
+
+    def windows(self, top: int = 0, left: int = 0, height: int = None,
+                width: int = None):
+        """Yields the (row slice, column slice) of every tile intersecting \
+the given region, clipped to it, in row-major order.
+
+Parameters:
+    top (int): First row of the region.
+    left (int): First column of the region.
+    height (int): Region height (defaults to the rest of the image).
+    width (int): Region width (defaults to the rest of the image).
+
+Returns:
+    Iterator[tuple[slice, slice]]: Tile windows in image coordinates.
+    """
+        img_h, img_w = self.shape[:2]
+        tile_h, tile_w = self.tile_size
+        bottom = img_h if height is None else min(img_h, top + height)
+        right = img_w if width is None else min(img_w, left + width)
+
+        for y in range(top - top % tile_h, bottom, tile_h):
+            y0, y1 = max(y, top), min(y + tile_h, bottom)
+            for x in range(left - left % tile_w, right, tile_w):
+                x0, x1 = max(x, left), min(x + tile_w, right)
+                yield slice(y0, y1), slice(x0, x1)
+
+    def tile(self, row: int, col: int) -> np.ndarray:
+        """Returns the tile at the given grid position as a memory-mapped \
+view.
+    """
+        tile_h, tile_w = self.tile_size
+        return self.data[row * tile_h:(row + 1) * tile_h,
+                         col * tile_w:(col + 1) * tile_w]
+
+    def flush(self):
+        """Writes pending changes to disk."""
+        if isinstance(self.data, np.memmap) and self.data.mode != "r":
+            self.data.flush()
+
+    def to_array(self) -> np.ndarray:
+        """Loads the whole image in memory (only for small images)."""
+        return np.array(self.data)
+
+    def map_tiles(self, func, path: str, channels: int | None = None,
+                  dtype=None) -> "TiledImage":
+        """Applies a per-pixel function to every tile and stores the \
+result in a new tiled image.
+
+Parameters:
+    func (Callable[[np.ndarray], np.ndarray]): Function applied to each \
+tile. It must keep the tile height and width.
+    path (str): Path of the output .npy file.
+    channels (int | None): Output channels, or None to keep the input ones \
+(0 for a 2D output).
+    dtype: Output pixel type (defaults to the input one).
+
+Returns:
+    TiledImage: The processed image.
+    """
+        height, width = self.shape[:2]
+        if channels is None:
+            shape = self.shape
+        elif channels == 0:
+            shape = (height, width)
+        else:
+            shape = (height, width, channels)
+        out = TiledImage.create(
+            path, shape, dtype or self.dtype, self.tile_size)
+        for window in self.windows():
+            out.data[window] = func(self.data[window])
+        out.flush()
+        return out
+
+    def crop(self, top: int, left: int, height: int, width: int,
+             path: str) -> "TiledImage":
+        """Copies a rectangular region into a new tiled image, reading \
+only the tiles it overlaps.
+
+Parameters:
+    top (int): First row of the region.
+    left (int): First column of the region.
+    height (int): Region height.
+    width (int): Region width.
+    path (str): Path of the output .npy file.
+
+Returns:
+    TiledImage: The cropped image, clipped to the image bounds.
+    """
+        img_h, img_w = self.shape[:2]
+        if not (0 <= top < img_h and 0 <= left < img_w):
+            raise ValueError("Crop origin is outside the image")
+        height = min(height, img_h - top)
+        width = min(width, img_w - left)
+        if height < 1 or width < 1:
+            raise ValueError("Image dimensions are too small for zoom.")
+
+        out = TiledImage.create(
+            path, (height, width) + self.shape[2:], self.dtype,
+            self.tile_size)
+        for rows, cols in self.windows(top, left, height, width):
+            out.data[rows.start - top:rows.stop - top,
+                     cols.start - left:cols.stop - left] = self.data[
+                         rows, cols]
+        out.flush()
+        return out
+
+    def cut(self, size: int, path: str) -> "TiledImage":
+        """Tiled equivalent of `cut`/`zoom`: square crop with the same \
+offsets.
+
+Parameters:
+    size (int): Desired size of the square crop.
+    path (str): Path of the output .npy file.
+
+Returns:
+    TiledImage: The cropped image.
+    """
+        height, width = self.shape[:2]
+        start_h, start_w, crop_size = cut_box(height, width, size)
+        if start_w >= width or start_h >= height:
+            raise ValueError("Image dimensions are too small for zoom.")
+        return self.crop(start_h, start_w, crop_size, crop_size, path)
+
+    def rgb_to_gray(self, path: str) -> "TiledImage":
+        """Tiled equivalent of `rgb_to_gray`, output shape (H, W, 1)."""
+        if self.data.ndim != 3 or self.shape[2] != 3:
+            return self.map_tiles(lambda tile: tile, path)
+        return self.map_tiles(rgb_to_gray, path, channels=1, dtype=np.uint8)
+
+    def invert(self, path: str) -> "TiledImage":
+        """Tiled equivalent of `ft_invert`."""
+        return self.map_tiles(lambda tile: 255 - tile, path)
+
+    def keep_channel(self, channel: int, path: str) -> "TiledImage":
+        """Tiled equivalent of `ft_red`/`ft_green`/`ft_blue`: keeps one \
+channel and sets the others to zero.
+
+Parameters:
+    channel (int): Index of the channel to keep (0 red, 1 green, 2 blue).
+    path (str): Path of the output .npy file.
+
+Returns:
+    TiledImage: The filtered image.
+    """
+        if self.data.ndim != 3 or not 0 <= channel < self.shape[2]:
+            raise ValueError("Invalid channel for this image")
+
+        def keep(tile: np.ndarray) -> np.ndarray:
+            out = np.zeros_like(tile)
+            out[..., channel] = tile[..., channel]
+            return out
+
+        return self.map_tiles(keep, path)
+
+    def transpose(self, path: str) -> "TiledImage":
+        """Tiled equivalent of `transpose`: tile (i, j) of the source \
+becomes tile (j, i) of the result.
+    """
+        height, width = self.shape[:2]
+        out = TiledImage.create(
+            path, (width, height) + self.shape[2:], self.dtype,
+            self.tile_size[::-1])
+        for rows, cols in self.windows():
+            out.data[cols, rows] = self.data[rows, cols].swapaxes(0, 1)
+        out.flush()
+        return out
+
+
+def _tile_pair(tile_size: int | tuple[int, int]) -> tuple[int, int]:
+    """Normalizes a tile size to a (height, width) pair."""
+    if isinstance(tile_size, int):
+        tile_size = (tile_size, tile_size)
+    tile_h, tile_w = tile_size
+    if tile_h < 1 or tile_w < 1:
+        raise ValueError("Tile size must be positive")
+    return int(tile_h), int(tile_w)
@@ -0,0 +1,171 @@
+import numpy as np
+import cv2
+
+
+BLOCK_SIZE = 256
+CV2_DTYPES = (np.uint8, np.int8, np.uint16, np.int16, np.int32,
+              np.float32, np.float64)
+CV2_ROTATIONS = {
+    1: cv2.ROTATE_90_COUNTERCLOCKWISE,
+    2: cv2.ROTATE_180,
+    3: cv2.ROTATE_90_CLOCKWISE,
+}
+
+
+def validate_image(img: np.ndarray):
+    """Checks that the input is a non-empty (H, W) or (H, W, C) image.
+
+Parameters:
+    img (np.ndarray): The image to check.
+
+Returns:
+    None
+    """
+    if img is None or img.size == 0:
+        raise ValueError("Invalid image format to transpose")
+    if img.ndim not in [2, 3]:
+        raise ValueError("Invalid image dimensions")
+
+
+def blocked_copy(view: np.ndarray, block: int = BLOCK_SIZE) -> np.ndarray:
+    """Copies a strided view into a new C-contiguous array, block by block.
+
+Copying square tiles keeps both the rows read from the source and the \
+rows written to the result in cache, which matters when the view swaps \
+the image axes. The channels of a pixel are copied as one element.
+
+Parameters:
+    view (np.ndarray): Image view (H, W) or (H, W, C).
+    block (int): Side of the square blocks, in pixels.
+
+Returns:
+    np.ndarray: Contiguous copy of the view.
+    """
+    if block < 1:
+        raise ValueError("Block size must be positive")
+
+    out = np.empty(view.shape, dtype=view.dtype)
+    src, dst = view, out
+    if view.ndim == 3 and (
+            view.shape[2] == 1 or view.strides[2] == view.itemsize):
+        src, dst = _pixels(view), _pixels(out)
+    height, width = view.shape[:2]
+    for i in range(0, height, block):
+        for j in range(0, width, block):
+            dst[i:i + block, j:j + block] = src[i:i + block, j:j + block]
+    return out
+
+
+def _pixels(img: np.ndarray) -> np.ndarray:
+    """Views a (H, W, C) image with contiguous channels as (H, W) pixels \
+of C packed channels.
+    """
+    if img.shape[2] == 1:
+        return img[..., 0]
+    packed = np.dtype((np.void, img.itemsize * img.shape[2]))
+    return img.view(packed)[..., 0]
+
+
+def _cv2_compatible(img: np.ndarray) -> bool:
+    """Checks that OpenCV can read the image without copying it."""
+    channels = img.shape[2] if img.ndim == 3 else 1
+    return (
+        img.dtype.type in CV2_DTYPES
+        and 1 <= channels <= 4
+        and img.strides[0] > 0
+        and (img.ndim == 2 or img.strides[1] == channels * img.itemsize)
+        and img.strides[-1] == img.itemsize
+    )
+
+
+def _result(img: np.ndarray, view: np.ndarray, k: int, copy: bool,
+            block: int) -> np.ndarray:
+    """Returns the view itself or a contiguous copy of it. `k` is the \
+number of quarter turns (or -1 for a transpose) used by the OpenCV path.
+    """
+    if not copy:
+        return view
+    if k != 0 and _cv2_compatible(img):
+        if k == -1:
+            result = cv2.transpose(img)
+        else:
+            result = cv2.rotate(img, CV2_ROTATIONS[k])
+        return result.reshape(view.shape)
+    if k in (-1, 1, 3):
+        return blocked_copy(view, block)
+    return view.copy(order="C")
+
+
+def transpose(img: np.ndarray, copy: bool = True,
+              block: int = BLOCK_SIZE) -> np.ndarray:
+    """Transposes an image (flips rows and columns), keeping the channels.
+
+Parameters:
+    img (np.ndarray): Input image (H, W) or (H, W, C).
+    copy (bool): Return a contiguous copy instead of a zero-copy view.
+    block (int): Block size of the copy.
+
+Returns:
+    np.ndarray: Transposed image (W, H) or (W, H, C).
+    """
+    validate_image(img)
+    return _result(img, img.swapaxes(0, 1), -1, copy, block)
+
+
+def rotate90(img: np.ndarray, k: int = 1, copy: bool = True,
+             block: int = BLOCK_SIZE) -> np.ndarray:
+    """Rotates an image by k quarter turns counter-clockwise.
+
+Parameters:
+    img (np.ndarray): Input image (H, W) or (H, W, C).
+    k (int): Number of quarter turns (negative for clockwise).
+    copy (bool): Return a contiguous copy instead of a zero-copy view.
+    block (int): Block size of the copy.
+
+Returns:
+    np.ndarray: Rotated image.
+    """
+    validate_image(img)
+    k %= 4
+    return _result(img, np.rot90(img, k, axes=(0, 1)), k, copy, block)
+
+
+def rotate180(img: np.ndarray, copy: bool = True,
+              block: int = BLOCK_SIZE) -> np.ndarray:
+    """Rotates an image by 180 degrees, see `rotate90`."""
+    return rotate90(img, 2, copy, block)
+
+
+def rotate270(img: np.ndarray, copy: bool = True,
+              block: int = BLOCK_SIZE) -> np.ndarray:
+    """Rotates an image by 270 degrees counter-clockwise (90 clockwise), \
+see `rotate90`."""
+    return rotate90(img, 3, copy, block)
+
+
+def flip_horizontal(img: np.ndarray, copy: bool = True) -> np.ndarray:
+    """Mirrors an image left to right.
+
+Parameters:
+    img (np.ndarray): Input image (H, W) or (H, W, C).
+    copy (bool): Return a contiguous copy instead of a zero-copy view.
+
+Returns:
+    np.ndarray: Flipped image.
+    """
+    validate_image(img)
+    return _result(img, img[:, ::-1], 0, copy, BLOCK_SIZE)
+
+
+def flip_vertical(img: np.ndarray, copy: bool = True) -> np.ndarray:
+    """Mirrors an image top to bottom.
+
+Parameters:
+    img (np.ndarray): Input image (H, W) or (H, W, C).
+    copy (bool): Return a contiguous copy instead of a zero-copy view.
+
+Returns:
+    np.ndarray: Flipped image.
+    """
+    validate_image(img)
+    return _result(img, img[::-1], 0, copy, BLOCK_SIZE)
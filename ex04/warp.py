@@ -0,0 +1,221 @@
+import numpy as np
+import cv2
+from memo import ArrayCache
+
+
+INTERPOLATIONS = {
+    "nearest": cv2.INTER_NEAREST,
+    "linear": cv2.INTER_LINEAR,
+    "cubic": cv2.INTER_CUBIC,
+    "lanczos": cv2.INTER_LANCZOS4,
+}
+BORDERS = {
+    "constant": cv2.BORDER_CONSTANT,
+    "replicate": cv2.BORDER_REPLICATE,
+    "reflect": cv2.BORDER_REFLECT,
+    "reflect101": cv2.BORDER_REFLECT_101,
+    "wrap": cv2.BORDER_WRAP,
+}
+# A map takes 8 bytes per output pixel: about 66 MB for a 4K image.
+MAP_CACHE_BYTES = 256 * 1024 * 1024
+map_cache = ArrayCache(MAP_CACHE_BYTES)
+
+
+def rotation_matrix(height: int, width: int, angle: float,
+                    expand: bool = False) -> tuple[np.ndarray, int, int]:
+    """Computes the affine matrix rotating an image around its center.
+
+Parameters:
+    height (int): Image height.
+    width (int): Image width.
+    angle (float): Rotation angle in degrees, counter-clockwise.
+    expand (bool): Enlarge the output so the whole rotated image fits, \
+instead of keeping the input size.
+
+Returns:
+    tuple[np.ndarray, int, int]: 2x3 matrix mapping input to output \
+coordinates, output height and output width.
+    """
+    center = ((width - 1) / 2, (height - 1) / 2)
+    matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+    out_h, out_w = height, width
+
+    if expand:
+        cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+        out_w = int(round(height * sin + width * cos))
+        out_h = int(round(height * cos + width * sin))
+        matrix[0, 2] += (out_w - width) / 2
+        matrix[1, 2] += (out_h - height) / 2
+    return matrix, out_h, out_w
+
+
+def rotation_map(
+        height: int,
+        width: int,
+        angle: float,
+        expand: bool = False
+        ) -> np.ndarray:
+    """Computes the `cv2.remap` coordinate map of a rotation. Results are \
+kept in `map_cache`, an LRU cache bounded by MAP_CACHE_BYTES and keyed by \
+(shape, angle, expand): the same map serves every interpolation.
+
+Parameters:
+    height (int): Image height.
+    width (int): Image width.
+    angle (float): Rotation angle in degrees, counter-clockwise.
+    expand (bool): Enlarge the output so the whole rotated image fits.
+
+Returns:
+    np.ndarray: Read-only (H_out, W_out, 2) float32 map giving, for each \
+output pixel, the (x, y) position it is sampled from.
+    """
+    if height < 1 or width < 1:
+        raise ValueError("Image dimensions are too small for rotation.")
+    key = f"rotation:{height}x{width}:{float(angle)!r}:{bool(expand)}"
+    return map_cache.get_or_compute(
+        key, lambda: _rotation_map(height, width, angle, expand))
+
+
+def _rotation_map(height: int, width: int, angle: float,
+                  expand: bool) -> np.ndarray:
+    """Computes the map of `rotation_map`, without caching it."""
+    matrix, out_h, out_w = rotation_matrix(height, width, angle, expand)
+    inverse = cv2.invertAffineTransform(matrix)
+
+    xs, ys = np.meshgrid(np.arange(out_w, dtype=np.float64),
+                         np.arange(out_h, dtype=np.float64))
+    coords = np.empty((out_h, out_w, 2), dtype=np.float32)
+    coords[..., 0] = inverse[0, 0] * xs + inverse[0, 1] * ys + inverse[0, 2]
+    coords[..., 1] = inverse[1, 0] * xs + inverse[1, 1] * ys + inverse[1, 2]
+    return coords
+
+
+def border_color(value) -> tuple:
+    """Turns a border value into the 4-channel color OpenCV expects.
+
+OpenCV reads a single number as (value, 0, 0, 0), which fills only the \
+first channel of an RGB image: a scalar is therefore repeated on every \
+channel, while a sequence gives one value per channel.
+
+Parameters:
+    value (float | Sequence[float]): Grey level, or per-channel values.
+
+Returns:
+    tuple: (c0, c1, c2, c3) border color.
+    """
+    if np.isscalar(value):
+        return (float(value),) * 4
+    value = tuple(float(v) for v in value)
+    if not 1 <= len(value) <= 4:
+        raise ValueError("Border value must have 1 to 4 channels")
+    return value + (0.0,) * (4 - len(value))
+
+
+def _remap(img: np.ndarray, coords: np.ndarray, interpolation: str,
+           border: str, border_value,
+           out: np.ndarray = None) -> np.ndarray:
+    """Applies a cached rotation map to one (H, W) or (H, W, C) image."""
+    shape = coords.shape[:2] + img.shape[2:]
+    if out is not None and out.shape != shape:
+        raise ValueError("Output array does not match the rotated image")
+
+    # OpenCV drops a single channel axis: work on (H, W) views instead.
+    src, dst = img, out
+    if img.ndim == 3 and img.shape[2] == 1:
+        src = img[..., 0]
+        dst = None if out is None else out[..., 0]
+
+    result = cv2.remap(
+        src, coords, None, INTERPOLATIONS[interpolation],
+        dst=dst, borderMode=BORDERS[border],
+        borderValue=border_color(border_value))
+    if out is None:
+        return result.reshape(shape)
+    if result is not dst:
+        out[...] = result.reshape(shape)
+    return out
+
+
+def _check_options(interpolation: str, border: str, border_value):
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Unknown interpolation '{interpolation}'")
+    if border not in BORDERS:
+        raise ValueError(f"Unknown border mode '{border}'")
+    border_color(border_value)
+
+
+def rotate(
+        img: np.ndarray,
+        angle: float,
+        interpolation: str = "linear",
+        border: str = "constant",
+        border_value: float | tuple = 0,
+        expand: bool = False,
+        out: np.ndarray = None
+        ) -> np.ndarray:
+    """Rotates an image by any angle around its center.
+
+Parameters:
+    img (np.ndarray): Input image (H, W) or (H, W, C), e.g. the grayscale \
+or RGB output of `cut`.
+    angle (float): Rotation angle in degrees, counter-clockwise.
+    interpolation (str): "nearest", "linear", "cubic" or "lanczos".
+    border (str): "constant", "replicate", "reflect", "reflect101" or \
+"wrap".
+    border_value (float | tuple): Fill value of the "constant" border: a \
+number fills every channel (255 is white), a tuple gives one value per \
+channel, e.g. (255, 0, 0) for red.
+    expand (bool): Enlarge the output so the whole rotated image fits.
+    out (np.ndarray): Optional preallocated output array.
+
+Returns:
+    np.ndarray: Rotated image.
+    """
+    if img is None or img.ndim not in [2, 3]:
+        raise ValueError("Invalid image dimensions")
+    _check_options(interpolation, border, border_value)
+
+    height, width = img.shape[:2]
+    coords = rotation_map(height, width, float(angle) % 360, expand)
+    return _remap(img, coords, interpolation, border, border_value, out)
+
+
+def rotate_batch(
+        stack: np.ndarray,
+        angle: float,
+        interpolation: str = "linear",
+        border: str = "constant",
+        border_value: float | tuple = 0,
+        expand: bool = False,
+        out: np.ndarray = None
+        ) -> np.ndarray:
+    """Rotates every image of a stack by the same angle, computing the \
+map once.
+
+Parameters:
+    stack (np.ndarray): Images (N, H, W) or (N, H, W, C).
+    angle (float): Rotation angle in degrees, counter-clockwise.
+    interpolation (str): See `rotate`.
+    border (str): See `rotate`.
+    border_value (float): See `rotate`.
+    expand (bool): See `rotate`.
+    out (np.ndarray): Optional preallocated output stack.
+
+Returns:
+    np.ndarray: Stack of rotated images.
+    """
+    if stack is None or stack.ndim not in [3, 4]:
+        raise ValueError("Stack must be in (N, H, W) or (N, H, W, C) format")
+    _check_options(interpolation, border, border_value)
+
+    height, width = stack.shape[1:3]
+    coords = rotation_map(height, width, float(angle) % 360, expand)
+    shape = (len(stack),) + coords.shape[:2] + stack.shape[3:]
+    if out is None:
+        out = np.empty(shape, dtype=stack.dtype)
+    elif out.shape != shape or out.dtype != stack.dtype:
+        raise ValueError("Output array does not match the rotated stack")
+
+    for i, img in enumerate(stack):
+        _remap(img, coords, interpolation, border, border_value, out[i])
+    return out
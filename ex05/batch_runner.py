@@ -0,0 +1,331 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+import multiprocessing
+from time import perf_counter
+import os
+import sys
+import numpy as np
+from PIL import Image
+from pimp_image import FILTERS, pimp_all
+
+
+PROGRESS_FILE = ".progress"
+EXTENSIONS = (".jpg", ".jpeg")
+
+
+def _attach(name: str, shape: tuple) -> tuple:
+    """Maps an existing shared memory block as a uint8 array."""
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.uint8, buffer=block.buf)
+
+
+def decode_worker(path: str, name: str, shape: tuple):
+    """Decodes a JPEG into the shared memory block `name`. Same checks as \
+ft_load, without printing the pixels.
+
+Parameters:
+    path (str): The JPEG file.
+    name (str): Shared memory block of the decoded pixels.
+    shape (tuple): (H, W, RGB) shape read from the file header.
+
+Returns:
+    None
+    """
+    with Image.open(path) as img:
+        if img.format not in ("JPEG", "JPG"):
+            raise ValueError("The file is not a JPEG or JPG image")
+        rgb = img.convert("RGB")
+    if (rgb.height, rgb.width, 3) != shape:
+        raise ValueError(f"Unexpected size {rgb.size} for '{path}'")
+    block, pixels = _attach(name, shape)
+    try:
+        pixels[...] = np.asarray(rgb)
+    finally:
+        del pixels
+        block.close()
+
+
+def filter_worker(name: str, outputs: dict, shape: tuple):
+    """Applies the filters to the pixels of a shared memory block, writing \
+each result into its own block.
+
+Parameters:
+    name (str): Shared memory block of the decoded pixels.
+    outputs (dict): Shared memory block of each filter result, by filter \
+name.
+    shape (tuple): (H, W, RGB) shape of the image.
+
+Returns:
+    None
+    """
+    blocks = []
+    try:
+        block, pixels = _attach(name, shape)
+        blocks.append(block)
+        out = {}
+        for filter_name, out_name in outputs.items():
+            block, out[filter_name] = _attach(out_name, shape)
+            blocks.append(block)
+        if pimp_all(pixels, list(outputs), out=out) is None:
+            raise ValueError("Filters failed")
+        del pixels, out
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def encode_worker(name: str, shape: tuple, path: str, quality: int):
+    """Encodes the pixels of a shared memory block as a JPEG file.
+
+Parameters:
+    name (str): Shared memory block of the pixels.
+    shape (tuple): (H, W, RGB) shape of the image.
+    path (str): Output file.
+    quality (int): JPEG quality.
+
+Returns:
+    None
+    """
+    block, pixels = _attach(name, shape)
+    try:
+        Image.fromarray(pixels).save(path, quality=quality)
+    finally:
+        del pixels
+        block.close()
+
+
+class _Job:
+    """Shared memory blocks and progress of one image."""
+
+    def __init__(self, path: str, shape: tuple, filters: list):
+        self.path = path
+        self.shape = shape
+        size = int(np.prod(shape))
+        self.source = shared_memory.SharedMemory(create=True, size=size)
+        self.outputs = {name: shared_memory.SharedMemory(
+            create=True, size=size) for name in filters}
+        self.remaining = len(filters)
+
+    @staticmethod
+    def _free(block: shared_memory.SharedMemory):
+        block.close()
+        block.unlink()
+
+    def release_source(self):
+        if self.source is not None:
+            self._free(self.source)
+            self.source = None
+
+    def release_output(self, name: str):
+        block = self.outputs.pop(name, None)
+        if block is not None:
+            self._free(block)
+
+    def release(self):
+        self.release_source()
+        for name in list(self.outputs):
+            self.release_output(name)
+
+
+def _mp_context():
+    """Start method of the workers. They are never forked from this \
+process, which may already run the OpenMP threads of compiled kernels: \
+OpenMP does not survive a fork."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+class BatchRunner:
+    """Applies the pimp_image filters to every JPEG of a directory with a \
+process pool. Decoding, filtering and encoding run as separate tasks that \
+exchange pixels through shared memory, so no pixel data is pickled.
+
+Completed images are recorded in a progress file in the output directory, \
+so an interrupted run resumes where it stopped.
+
+Parameters:
+    input_dir (str): Directory of JPEG images.
+    output_dir (str): Directory receiving "<name>_<filter>.jpg" files.
+    filters (Iterable[str]): Filters to apply, see pimp_image.FILTERS.
+    workers (int): Number of processes (defaults to the CPU count).
+    max_inflight (int): Images held in shared memory at the same time \
+(defaults to twice the number of workers).
+    quality (int): JPEG quality of the outputs.
+    """
+
+    def __init__(self, input_dir: str, output_dir: str, filters=FILTERS,
+                 workers: int = None, max_inflight: int = None,
+                 quality: int = 90):
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.filters = list(dict.fromkeys(filters))
+        for name in self.filters:
+            if name not in FILTERS:
+                raise ValueError(f"Unknown filter '{name}'")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or 2 * self.workers
+        self.quality = quality
+        self.failed = {}
+
+    def _progress_path(self) -> str:
+        return os.path.join(self.output_dir, PROGRESS_FILE)
+
+    def _done(self) -> set:
+        """Names of the images completed by previous runs."""
+        if not os.path.exists(self._progress_path()):
+            return set()
+        with open(self._progress_path()) as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def pending(self) -> list:
+        """Returns the JPEG files of the input directory not processed yet."""
+        done = self._done()
+        names = sorted(name for name in os.listdir(self.input_dir)
+                       if name.lower().endswith(EXTENSIONS))
+        return [name for name in names if name not in done]
+
+    def _output_path(self, path: str, filter_name: str) -> str:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.output_dir, f"{stem}_{filter_name}.jpg")
+
+    def _start(self, pool, name: str, futures: dict, jobs: list) -> int:
+        """Allocates the shared memory of an image and submits its decoding.
+Returns the input file size."""
+        path = os.path.join(self.input_dir, name)
+        with Image.open(path) as img:  # reads the header only
+            width, height = img.size
+        job = _Job(path, (height, width, 3), self.filters)
+        jobs.append(job)
+        future = pool.submit(
+            decode_worker, path, job.source.name, job.shape)
+        futures[future] = (job, "decode", None)
+        return os.path.getsize(path)
+
+    def run(self) -> dict:
+        """Processes every pending image of the input directory.
+
+Returns:
+    dict: Throughput report (images, seconds, images/s, MB/s).
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        queue = self.pending()
+        futures = {}
+        jobs = []
+        images = 0
+        input_bytes = 0
+        pixel_bytes = 0
+        start = perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=_mp_context()) as pool, open(
+                self._progress_path(), "a") as progress:
+            try:
+                while queue or futures:
+                    while queue and len(jobs) < self.max_inflight:
+                        name = queue.pop(0)
+                        try:
+                            input_bytes += self._start(
+                                pool, name, futures, jobs)
+                        except Exception as e:
+                            self.failed[name] = str(e)
+                    if not futures:
+                        continue
+
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job, stage, filter_name = futures.pop(future)
+                        if job not in jobs:
+                            continue  # another task of the image failed
+                        try:
+                            future.result()
+                        except Exception as e:
+                            self.failed[os.path.basename(job.path)] = str(e)
+                            job.release()
+                            jobs.remove(job)
+                            continue
+
+                        if stage == "decode":
+                            outputs = {name: block.name for name, block
+                                       in job.outputs.items()}
+                            futures[pool.submit(
+                                filter_worker, job.source.name, outputs,
+                                job.shape)] = (job, "filter", None)
+                        elif stage == "filter":
+                            job.release_source()
+                            for name, block in job.outputs.items():
+                                futures[pool.submit(
+                                    encode_worker, block.name, job.shape,
+                                    self._output_path(job.path, name),
+                                    self.quality)] = (job, "encode", name)
+                        else:
+                            job.release_output(filter_name)
+                            job.remaining -= 1
+                            if job.remaining == 0:
+                                jobs.remove(job)
+                                images += 1
+                                pixel_bytes += int(np.prod(job.shape))
+                                progress.write(
+                                    os.path.basename(job.path) + "\n")
+                                progress.flush()
+            finally:
+                for future in futures:
+                    future.cancel()
+                for job in jobs:
+                    job.release()
+
+        seconds = perf_counter() - start
+        return {
+            "images": images,
+            "failed": len(self.failed),
+            "seconds": seconds,
+            "images_per_s": images / seconds if seconds else 0.0,
+            "input_mb_per_s": input_bytes / 1e6 / seconds if seconds else 0.0,
+            "pixel_mb_per_s": pixel_bytes / 1e6 / seconds if seconds else 0.0,
+        }
+
+
+def print_report(report: dict):
+    """Prints a report returned by `BatchRunner.run`.
+
+Parameters:
+    report (dict): The report.
+
+Returns:
+    None
+    """
+    print(f"{report['images']} images ({report['failed']} failed) in "
+          f"{report['seconds']:.2f}s: {report['images_per_s']:.1f} images/s, "
+          f"{report['input_mb_per_s']:.1f} MB/s of JPEG, "
+          f"{report['pixel_mb_per_s']:.1f} MB/s of pixels")
+
+
+def main():
+    """Runs the filters on the directory given on the command line.
+
+Parameters:
+    None
+
+Returns:
+    None
+    """
+    try:
+        if len(sys.argv) not in [3, 4]:
+            raise AssertionError("usage: python batch_runner.py "
+                                 "<input_dir> <output_dir> [workers]")
+        workers = int(sys.argv[3]) if len(sys.argv) == 4 else None
+        runner = BatchRunner(sys.argv[1], sys.argv[2], workers=workers)
+        print_report(runner.run())
+        for name, error in runner.failed.items():
+            print(f"Error: {name}: {error}")
+
+    except KeyboardInterrupt:
+        print("\nBatch Program: Operation cancelled by user (Ctrl+C).")
+    except Exception as e:
+        print(f"Exception: Batch Program: {e}")
+    finally:
+        print("\nProgram ended...")
+
+
+if __name__ == "__main__":
+    main()
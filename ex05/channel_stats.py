@@ -0,0 +1,175 @@
+import numpy as np
+from pimp_image import CHANNELS, _blocks, validate_array
+
+
+PERCENTILES = (1, 5, 50, 95, 99)
+LEVELS = np.arange(256)
+
+
+class ChannelStats:
+    """Per-channel statistics of uint8 RGB images, built from 256-bin \
+histograms.
+
+Every pixel is read once, to update the histograms; the count, mean, \
+standard deviation, min/max, percentiles and clipping are then derived \
+from the 3 x 256 bins alone. Statistics can be updated with more tiles or \
+frames, or merged, so checking every frame of a stream costs one read \
+per frame.
+
+Parameters:
+    array (np.ndarray): Optional first (H, W, RGB) image or \
+(N, H, W, RGB) stack.
+    """
+
+    def __init__(self, array=None):
+        self.histogram = np.zeros((3, 256), dtype=np.int64)
+        self.frames = 0
+        if array is not None:
+            self.update(array)
+
+    def update(self, array) -> "ChannelStats":
+        """Adds the pixels of an image, a tile or a stack of frames.
+
+Parameters:
+    array (np.ndarray): (H, W, RGB) or (N, H, W, RGB) uint8 array.
+
+Returns:
+    ChannelStats: self, so calls can be chained.
+        """
+        validate_array(array)
+        if array.dtype != np.uint8:
+            raise ValueError("Array must be of type uint8")
+
+        # Blocks stay in cache while their three channels are counted.
+        for rows in _blocks(array.shape):
+            block = array[rows].reshape(-1, 3)
+            for channel in range(3):
+                self.histogram[channel] += np.bincount(
+                    block[:, channel], minlength=256)
+        self.frames += array.shape[0] if array.ndim == 4 else 1
+        return self
+
+    def merge(self, other: "ChannelStats") -> "ChannelStats":
+        """Adds the statistics of another ChannelStats, e.g. those of a \
+single frame into running totals.
+
+Parameters:
+    other (ChannelStats): The statistics to add.
+
+Returns:
+    ChannelStats: self.
+        """
+        self.histogram += other.histogram
+        self.frames += other.frames
+        return self
+
+    def reset(self):
+        """Forgets every pixel seen so far."""
+        self.histogram[...] = 0
+        self.frames = 0
+
+    @property
+    def count(self) -> int:
+        """Number of pixels seen."""
+        return int(self.histogram[0].sum())
+
+    def _check_count(self):
+        if self.count == 0:
+            raise ValueError("No pixel to compute statistics on")
+
+    @property
+    def mean(self) -> np.ndarray:
+        """Mean of each channel, shape (3,)."""
+        self._check_count()
+        return self.histogram @ LEVELS / self.count
+
+    @property
+    def std(self) -> np.ndarray:
+        """Standard deviation of each channel, shape (3,)."""
+        mean = self.mean
+        deviations = (LEVELS - mean[:, np.newaxis]) ** 2
+        return np.sqrt((self.histogram * deviations).sum(axis=1) / self.count)
+
+    @property
+    def min(self) -> np.ndarray:
+        """Lowest value of each channel, shape (3,)."""
+        self._check_count()
+        return (self.histogram > 0).argmax(axis=1)
+
+    @property
+    def max(self) -> np.ndarray:
+        """Highest value of each channel, shape (3,)."""
+        self._check_count()
+        return 255 - (self.histogram[:, ::-1] > 0).argmax(axis=1)
+
+    def percentile(self, q) -> np.ndarray:
+        """Percentiles of each channel, exact for the pixels seen (same \
+values as np.percentile with method="inverted_cdf").
+
+Parameters:
+    q (float | Sequence[float]): Percentile(s) between 0 and 100.
+
+Returns:
+    np.ndarray: Shape (3,) for a single percentile, else (len(q), 3).
+        """
+        self._check_count()
+        q = np.asarray(q, dtype=np.float64)
+        if np.any((q < 0) | (q > 100)):
+            raise ValueError("Percentiles must be between 0 and 100")
+        ranks = np.maximum(np.ceil(q * self.count / 100), 1)
+        cumulative = self.histogram.cumsum(axis=1)
+        return np.stack([np.searchsorted(cumulative[c], ranks)
+                         for c in range(3)], axis=-1)
+
+    def clipped(self) -> tuple[np.ndarray, np.ndarray]:
+        """Fractions of pixels at 0 and at 255 in each channel, the usual \
+under/over-exposure measure.
+
+Returns:
+    tuple[np.ndarray, np.ndarray]: (fraction at 0, fraction at 255), \
+each of shape (3,).
+        """
+        self._check_count()
+        return (self.histogram[:, 0] / self.count,
+                self.histogram[:, 255] / self.count)
+
+    def summary(self, percentiles=PERCENTILES) -> dict:
+        """Returns every statistic, by channel name.
+
+Parameters:
+    percentiles (Sequence[float]): Percentiles to report.
+
+Returns:
+    dict: {"red": {"mean": ..., "std": ..., "min": ..., "max": ..., \
+"percentiles": {q: value}, "clipped_low": ..., "clipped_high": ...}, ...}
+        """
+        mean, std, low, high = self.mean, self.std, self.min, self.max
+        values = self.percentile(list(percentiles))
+        clipped_low, clipped_high = self.clipped()
+        return {name: {
+            "mean": float(mean[c]),
+            "std": float(std[c]),
+            "min": int(low[c]),
+            "max": int(high[c]),
+            "percentiles": {q: int(values[i, c])
+                            for i, q in enumerate(percentiles)},
+            "clipped_low": float(clipped_low[c]),
+            "clipped_high": float(clipped_high[c]),
+        } for name, c in CHANNELS.items()}
+
+    def __repr__(self) -> str:
+        return f"ChannelStats(frames={self.frames}, pixels={self.count})"
+
+
+def ft_stats(array, percentiles=PERCENTILES) -> dict:
+    """
+Computes the statistics of each channel of the image received \
+in one pass, see ChannelStats.summary.
+    """
+    try:
+        return ChannelStats(array).summary(percentiles)
+    except ValueError as e:
+        print(f"Error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: ft_stats: {e}")
+    return None
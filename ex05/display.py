@@ -0,0 +1,153 @@
+from threading import Thread
+import queue
+import numpy as np
+from PIL import Image
+
+
+_CLOSE = object()
+
+
+def contact_sheet(images: list, columns: int = None, padding: int = 4,
+                  background: int = 255) -> np.ndarray:
+    """Tiles several images into one (H, W, RGB) contact sheet.
+
+Parameters:
+    images (list[np.ndarray]): (H, W), (H, W, RGB) images or \
+(N, H, W, RGB) stacks, which are split into their images.
+    columns (int): Number of images per row (defaults to a square grid).
+    padding (int): Space between the images, in pixels.
+    background (int): Grey level of the space between the images.
+
+Returns:
+    np.ndarray: The contact sheet.
+    """
+    tiles = []
+    for img in images:
+        img = np.asarray(img)
+        if img.ndim == 4:
+            tiles.extend(img)
+        elif img.ndim in [2, 3]:
+            tiles.append(img)
+        else:
+            raise ValueError("Invalid image dimensions")
+    if not tiles:
+        raise ValueError("No image to tile")
+
+    if columns is None:
+        columns = int(np.ceil(np.sqrt(len(tiles))))
+    rows = -(-len(tiles) // columns)
+    cell_h = max(tile.shape[0] for tile in tiles)
+    cell_w = max(tile.shape[1] for tile in tiles)
+
+    sheet = np.full((rows * cell_h + (rows + 1) * padding,
+                     columns * cell_w + (columns + 1) * padding, 3),
+                    background, dtype=np.uint8)
+    for i, tile in enumerate(tiles):
+        top = padding + (i // columns) * (cell_h + padding)
+        left = padding + (i % columns) * (cell_w + padding)
+        if tile.ndim == 3 and tile.shape[2] == 1:
+            tile = tile[..., 0]
+        if tile.ndim == 2:
+            tile = tile[..., np.newaxis]
+        sheet[top:top + tile.shape[0], left:left + tile.shape[1]] = tile
+    return sheet
+
+
+class DisplayQueue:
+    """Displays images on a background thread, so computing them never \
+waits for an image viewer.
+
+In "window" mode every image is shown as soon as it is queued. In "sheet" \
+mode the images are collected and tiled into a single contact sheet when \
+the queue is closed, then shown, or saved if a path is given.
+
+Parameters:
+    mode (str): "window" or "sheet".
+    path (str): File the contact sheet is saved to, instead of shown.
+    columns (int): Images per row of the contact sheet.
+    maxsize (int): Number of images waiting to be displayed before put \
+blocks.
+    """
+
+    def __init__(self, mode: str = "window", path: str = None,
+                 columns: int = None, maxsize: int = 16):
+        if mode not in ("window", "sheet"):
+            raise ValueError(f"Unknown display mode '{mode}'")
+        self.mode = mode
+        self.path = path
+        self.columns = columns
+        self.errors = []
+        self._closed = False
+        self._images = []
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, image: np.ndarray, title: str = None):
+        """Queues an image, or a stack of images, for display. Once the \
+queue is closed, the image is dropped and the error is recorded in \
+`errors`, so the filter producing it still returns its result.
+
+Parameters:
+    image (np.ndarray): The image.
+    title (str): Optional window title.
+
+Returns:
+    None
+        """
+        if self._closed or not self._thread.is_alive():
+            error = RuntimeError(f"Display queue is closed, {title or 'image'}"
+                                 " dropped")
+            self.errors.append(error)
+            print(f"Display error: {error}")
+            return
+        self._queue.put((image, title))
+
+    def close(self):
+        """Waits for the queued images to be displayed (and the contact \
+sheet to be rendered) and stops the thread.
+
+Returns:
+    None
+        """
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+
+    def __enter__(self) -> "DisplayQueue":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                break
+            try:
+                self._display(*item)
+            except Exception as e:
+                self.errors.append(e)
+                print(f"Display error: {e}")
+        if self.mode == "sheet" and self._images:
+            try:
+                sheet = Image.fromarray(
+                    contact_sheet(self._images, self.columns))
+                if self.path is not None:
+                    sheet.save(self.path)
+                else:
+                    sheet.show()
+            except Exception as e:
+                self.errors.append(e)
+                print(f"Display error: {e}")
+
+    def _display(self, image: np.ndarray, title: str):
+        if self.mode == "sheet":
+            self._images.append(image)
+        elif image.ndim == 4:
+            for i, img in enumerate(image):
+                Image.fromarray(img).show(title=f"{title or ''} {i}".strip())
+        else:
+            Image.fromarray(np.ascontiguousarray(image)).show(title=title)
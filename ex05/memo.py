@@ -0,0 +1,290 @@
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+import hashlib
+import os
+import weakref
+import numpy as np
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DIGEST_SIZE = 16
+
+
+# Arrays created by ArrayCache, by id: [weak reference, digest or None].
+_cached_arrays = {}
+
+
+def _register(array: np.ndarray):
+    """Records an array owned by an ArrayCache, whose digest can then be \
+remembered."""
+    key = id(array)
+    _cached_arrays[key] = [weakref.ref(
+        array, lambda _: _cached_arrays.pop(key, None)), None]
+
+
+def _cached_entry(array: np.ndarray) -> list | None:
+    """Returns the registry entry of an array created by ArrayCache, or of \
+a view of all of it (as returned by the cache), else None."""
+    owner = array if array.base is None else array.base
+    entry = _cached_arrays.get(id(owner))
+    if entry is None or entry[0]() is not owner:
+        return None
+    if array is not owner and (
+            array.dtype != owner.dtype or array.shape != owner.shape
+            or array.strides != owner.strides
+            or array.ctypes.data != owner.ctypes.data):
+        return None
+    return entry
+
+
+def array_digest(array: np.ndarray) -> str:
+    """Hashes the content, shape and dtype of an array.
+
+The digest of an array stored by ArrayCache (or of the read-only view of \
+it handed out by the cache) is remembered for as long as the array lives: \
+no one else holds a writeable reference to it. Any other array is hashed \
+on every call, whatever its flags.
+
+Parameters:
+    array (np.ndarray): The array.
+
+Returns:
+    str: Hexadecimal BLAKE2b digest of DIGEST_SIZE bytes.
+    """
+    entry = _cached_entry(array)
+    if entry is not None and entry[1] is not None:
+        return entry[1]
+
+    digest = hashlib.blake2b(f"{array.dtype.str}{array.shape}".encode(),
+                             digest_size=DIGEST_SIZE)
+    if array.size:
+        digest.update(memoryview(np.ascontiguousarray(array)).cast("B"))
+    digest = digest.hexdigest()
+    if entry is not None:
+        entry[1] = digest
+    return digest
+
+
+_file_digests = {}
+
+
+def file_digest(path: str) -> str:
+    """Hashes the content of a file. Digests are remembered while the file \
+size and modification time do not change.
+
+Parameters:
+    path (str): The file.
+
+Returns:
+    str: Hexadecimal BLAKE2b digest of DIGEST_SIZE bytes.
+    """
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if signature not in _file_digests:
+        digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _file_digests[signature] = digest.hexdigest()
+    return _file_digests[signature]
+
+
+def _describe(value) -> str:
+    """Turns an argument into a key fragment, hashing arrays by content."""
+    if isinstance(value, np.ndarray):
+        return "array:" + array_digest(value)
+    if isinstance(value, (list, tuple)):
+        return "(" + ",".join(_describe(item) for item in value) + ")"
+    return repr(value)
+
+
+def make_key(op: str, *args, **kwargs) -> str:
+    """Builds the cache key of an operation and its arguments.
+
+Parameters:
+    op (str): Operation name.
+    *args: Positional arguments, arrays being hashed by content.
+    **kwargs: Keyword arguments, arrays being hashed by content.
+
+Returns:
+    str: The key.
+    """
+    parts = [op] + [_describe(arg) for arg in args] + [
+        f"{name}={_describe(value)}" for name, value in sorted(kwargs.items())]
+    return hashlib.blake2b("|".join(parts).encode(),
+                           digest_size=DIGEST_SIZE).hexdigest()
+
+
+def chain_key(path: str, *steps) -> str:
+    """Builds the cache key of a chain of operations applied to an image \
+file, from the file content and the steps.
+
+Parameters:
+    path (str): The source image file.
+    *steps: Operations and their parameters, e.g. ("cut", 400), "gray".
+
+Returns:
+    str: The key.
+    """
+    return make_key("chain", file_digest(path), *steps)
+
+
+def _read_only_view(array: np.ndarray) -> np.ndarray:
+    """Returns a view of a read-only array. NumPy refuses to make a view \
+of a read-only array writeable."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class ArrayCache:
+    """LRU cache of arrays bounded by a byte budget, with an optional \
+on-disk store behind it.
+
+The cache owns a read-only copy of each array and hands out read-only \
+views of it, which cannot be made writeable again: callers share the \
+arrays without being able to change the cached data.
+
+Parameters:
+    max_bytes (int): Memory budget of the cached arrays.
+    disk_dir (str): Optional directory keeping every result as a .npy file.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES,
+                 disk_dir: str = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key + ".npy")
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Returns the cached array of a key, or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _read_only_view(self._entries[key])
+
+        if self.disk_dir is not None and os.path.exists(
+                self._disk_path(key)):
+            array = np.load(self._disk_path(key))
+            with self._lock:
+                self.disk_hits += 1
+            self._store(key, array)
+            return _read_only_view(array)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, array: np.ndarray) -> np.ndarray:
+        """Stores a copy of an array and returns a read-only view of the \
+cached copy.
+        """
+        array = np.array(array)
+        if self.disk_dir is not None:
+            tmp = self._disk_path(key) + f".{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, self._disk_path(key))
+        self._store(key, array)
+        return _read_only_view(array)
+
+    def _store(self, key: str, array: np.ndarray):
+        array.flags.writeable = False
+        _register(array)
+        if array.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key).nbytes
+            self._entries[key] = array
+            self.bytes += array.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def get_or_compute(self, key: str, compute) -> np.ndarray:
+        """Returns the cached array of a key, computing and storing it on \
+a miss.
+
+Parameters:
+    key (str): The key, see make_key and chain_key.
+    compute (Callable[[], np.ndarray]): Computes the array.
+
+Returns:
+    np.ndarray: The (read-only) array, or the result of compute when it \
+is not an array (not cached).
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        result = compute()
+        if not isinstance(result, np.ndarray):
+            return result
+        return self.put(key, result)
+
+    def clear(self):
+        """Empties the memory cache (the disk store is kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """Returns the cache statistics, including the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups
+                if lookups else 0.0,
+            }
+
+
+default_cache = ArrayCache()
+
+
+def memoize(func=None, cache: ArrayCache = None, name: str = None):
+    """Wraps an array function (zoom, cut, rgb_to_gray, transpose, ft_*...) \
+so results are looked up by a content hash of its arguments before being \
+computed. Usable as memoize(func) or as a decorator.
+
+Parameters:
+    func (Callable): The function.
+    cache (ArrayCache): Cache to use (defaults to default_cache).
+    name (str): Operation name in the keys (defaults to the module and \
+function names).
+
+Returns:
+    Callable: The memoized function. It returns read-only arrays.
+    """
+    if func is None:
+        return lambda f: memoize(f, cache, name)
+    op = name or f"{func.__module__}.{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        store = cache if cache is not None else default_cache
+        key = make_key(op, *args, **kwargs)
+        return store.get_or_compute(key, lambda: func(*args, **kwargs))
+
+    wrapper.cache = cache
+    return wrapper
@@ -1,34 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from PIL import Image
+import pimp_kernels
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+
+FILTERS = ("invert", "red", "green", "blue", "grey")
+CHANNELS = {"red": 0, "green": 1, "blue": 2}
+BLOCK_PIXELS = 1 << 18
 
 
 def validate_array(array):
     """
-    Validates that the input array is a 3D NumPy array in (H, W, RGB) format.
+    Validates that the input array is a 3D NumPy array in (H, W, RGB) format, \
+or a 4D stack of such images in (N, H, W, RGB) format.
 
 Parameters:
-    array (np.ndarray): The image array to validate. Must be a 3D array with \
-shape (H, W, 3) representing RGB channels.
+    array (np.ndarray): The image array to validate. Must have shape \
+(H, W, 3) or (N, H, W, 3), the last axis holding the RGB channels.
 
 Return:
     None
     """
     if array is None:
         raise ValueError("Input array is None")
-    if array.ndim != 3:
+    if array.ndim not in [3, 4]:
         raise ValueError("Array must be in (H, W, RGB) format")
-    if array.shape[2] != 3:
+    if array.shape[-1] != 3:
         raise ValueError("Input array must be a 3D array (H, W, RGB)")
 
 
-def ft_invert(array) -> np.ndarray:
+def _display(array, display, title: str):
+    """
+Queues a filter result on the display sink, if any.
+    """
+    if display is not None:
+        display.put(array, title)
+
+
+def ft_invert(array, display=None) -> np.ndarray:
     """
 Inverts the color of the image received.
+The result is queued on display (a DisplayQueue) when one is given.
     """
     try:
         validate_array(array)
         invert_arr = 255 - array
-        Image.fromarray(invert_arr).show()
+        _display(invert_arr, display, "invert")
         return invert_arr
     except ValueError as e:
         print(f"Error: {e}")
@@ -37,15 +58,16 @@ Inverts the color of the image received.
     return None
 
 
-def ft_red(array) -> np.ndarray:
+def ft_red(array, display=None) -> np.ndarray:
     """
 Keeps only the red channel, sets green and blue to zero.
+The result is queued on display (a DisplayQueue) when one is given.
     """
     try:
         validate_array(array)
         red_img = np.zeros_like(array)
-        red_img[:, :, 0] = array[:, :, 0]
-        Image.fromarray(red_img).show()
+        red_img[..., 0] = array[..., 0]
+        _display(red_img, display, "red")
         return red_img
     except ValueError as e:
         print(f"Error: {e}")
@@ -54,15 +76,16 @@ Keeps only the red channel, sets green and blue to zero.
     return None
 
 
-def ft_green(array) -> np.ndarray:
+def ft_green(array, display=None) -> np.ndarray:
     """
 Keeps only the green channel, sets red and blue to zero.
+The result is queued on display (a DisplayQueue) when one is given.
     """
     try:
         validate_array(array)
         green_img = np.zeros_like(array)
-        green_img[:, :, 1] = array[:, :, 1]
-        Image.fromarray(green_img).show()
+        green_img[..., 1] = array[..., 1]
+        _display(green_img, display, "green")
         return green_img
     except ValueError as e:
         print(f"Error: {e}")
@@ -71,15 +94,16 @@ Keeps only the green channel, sets red and blue to zero.
     return None
 
 
-def ft_blue(array) -> np.ndarray:
+def ft_blue(array, display=None) -> np.ndarray:
     """
 Keeps only the blue channel, sets red and green to zero.
+The result is queued on display (a DisplayQueue) when one is given.
     """
     try:
         validate_array(array)
         blue_img = np.zeros_like(array)
-        blue_img[:, :, 2] = array[:, :, 2]
-        Image.fromarray(blue_img).show()
+        blue_img[..., 2] = array[..., 2]
+        _display(blue_img, display, "blue")
         return blue_img
     except ValueError as e:
         print(f"Error: {e}")
@@ -88,22 +112,400 @@ Keeps only the blue channel, sets red and green to zero.
     return None
 
 
-def ft_grey(array) -> np.ndarray:
+def ft_grey(array, copy: bool = False, display=None) -> np.ndarray:
     """
 Converts the image to grayscale while keeping the shape (H, W, RGB), \
 using only division (/).
+
+The result is a read-only (H, W, RGB) view broadcasting a single grey \
+plane, unless copy is True. It is queued on display (a DisplayQueue) when \
+one is given.
     """
     try:
         validate_array(array)
-        channels = np.stack(
-            [array[:, :, 0], array[:, :, 1], array[:, :, 2]], axis=-1)
-        grey = (channels / 3).mean(axis=-1)
-        grey = grey.astype(np.uint8)
-        grey_img = np.stack([grey, grey, grey], axis=-1)
-        Image.fromarray(grey_img).show()
+        grey = grey_plane(array)
+        grey_img = np.broadcast_to(grey[..., np.newaxis], array.shape)
+        if copy:
+            grey_img = np.array(grey_img)
+        _display(grey_img, display, "grey")
         return grey_img
     except ValueError as e:
         print(f"Error: {e}")
     except Exception as e:
         print(f"An unexpected error occurred: ft_grey: {e}")
     return None
+
+
+def grey_plane(array) -> np.ndarray:
+    """
+Computes the grey level of each pixel of an (..., RGB) array, using only \
+division, as a (...) uint8 array: the sum of the channels divided by 9.
+
+The sum is accumulated in uint16 and divided as an integer, giving the \
+same values as the former float64 (channels / 3).mean() without its \
+float copies of the image.
+    """
+    if pimp_kernels.jit_enabled() and array.dtype == np.uint8:
+        return pimp_kernels.grey_plane(array)
+    if array.dtype != np.uint8:
+        channels = np.stack(
+            [array[..., 0], array[..., 1], array[..., 2]], axis=-1)
+        return (channels / 3).mean(axis=-1).astype(np.uint8)
+
+    total = array[..., 0].astype(np.uint16)
+    total += array[..., 1]
+    total += array[..., 2]
+    grey, remainder = np.divmod(total, 9)
+    grey = grey.astype(np.uint8)
+
+    # The float expression rounds some exact multiples of 9 down by one:
+    # it is evaluated again on those pixels only, to keep the same values.
+    multiple = remainder == 0
+    if multiple.any():
+        pixels = array[multiple]
+        grey[multiple] = (pixels / 3).mean(axis=-1).astype(np.uint8)
+    return grey
+
+
+def _output(name: str, array, out: dict) -> np.ndarray:
+    """
+Returns the buffer receiving the output of a filter: the one given in \
+`out`, or a new zeroed array.
+    """
+    dtype = np.uint8 if name == "grey" else array.dtype
+    if out is None or name not in out:
+        return np.zeros(array.shape, dtype=dtype)
+    buffer = out[name]
+    if buffer.shape != array.shape or buffer.dtype != dtype:
+        raise ValueError(f"Output buffer for '{name}' does not match")
+    if name in CHANNELS:
+        buffer.fill(0)
+    return buffer
+
+
+def _check_filters(filters) -> list:
+    """
+Returns the requested filter names without duplicates, checking them.
+    """
+    filters = list(dict.fromkeys(filters))
+    for name in filters:
+        if name not in FILTERS:
+            raise ValueError(f"Unknown filter '{name}'")
+    return filters
+
+
+def _blocks(shape: tuple):
+    """
+Yields the indices of blocks of about BLOCK_PIXELS pixels covering an \
+(H, W, RGB) image or an (N, H, W, RGB) stack: blocks of rows of an image, \
+or blocks of whole images when they are small.
+    """
+    height, width = shape[-3:-1]
+    image_pixels = max(1, height * width)
+    if len(shape) == 4 and image_pixels < BLOCK_PIXELS:
+        step = BLOCK_PIXELS // image_pixels
+        for start in range(0, shape[0], step):
+            yield (slice(start, start + step),)
+        return
+
+    step = max(1, BLOCK_PIXELS // max(1, width))
+    for index in np.ndindex(shape[:-3]):
+        for start in range(0, height, step):
+            yield index + (slice(start, start + step),)
+
+
+def _compute(array, results: dict):
+    """
+Writes the filters of an (H, W, RGB) or (N, H, W, RGB) array into the \
+result buffers (zeroed for the channel filters), by blocks so the source \
+pixels stay in cache while every output reads them.
+    """
+    for rows in _blocks(array.shape):
+        block = array[rows]
+        for name, result in results.items():
+            result = result[rows]
+            if name == "invert":
+                np.subtract(255, block, out=result, casting="unsafe")
+            elif name == "grey":
+                result[...] = grey_plane(block)[..., np.newaxis]
+            else:
+                channel = CHANNELS[name]
+                result[..., channel] = block[..., channel]
+
+
+def pimp_all(array, filters=FILTERS, out: dict = None,
+             lazy: bool = False) -> dict:
+    """
+Computes several filters of the image in a single pass over the source, \
+without displaying them.
+
+Parameters:
+    array (np.ndarray): The (H, W, RGB) image, or an (N, H, W, RGB) stack.
+    filters (Iterable[str]): Filters to compute, among "invert", "red", \
+"green", "blue" and "grey".
+    out (dict): Optional preallocated buffers shaped like array, by filter \
+name.
+    lazy (bool): Return the red, green and blue filters as read-only \
+(..., H, W) views of the source channel instead of RGB images, and \
+grey as a read-only RGB view broadcasting a single grey plane.
+
+Return:
+    dict: The filtered images, by filter name.
+    """
+    try:
+        validate_array(array)
+        filters = _check_filters(filters)
+
+        results = {}
+        computed = {}
+        for name in filters:
+            if lazy and name in CHANNELS:
+                view = array[..., CHANNELS[name]]
+                view.flags.writeable = False
+                results[name] = view
+            elif lazy and name == "grey":
+                results[name] = np.broadcast_to(
+                    grey_plane(array)[..., np.newaxis], array.shape)
+            else:
+                results[name] = computed[name] = _output(name, array, out)
+
+        _compute(array, computed)
+        return results
+    except ValueError as e:
+        print(f"Error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: pimp_all: {e}")
+    return None
+
+
+def ft_batch(stack, filters=FILTERS, chunk_size: int = None,
+             workers: int = None, out: dict = None) -> dict:
+    """
+Applies filters to a whole (N, H, W, RGB) stack of images, validating it \
+once, without displaying the results.
+
+Parameters:
+    stack (np.ndarray): The (N, H, W, RGB) images.
+    filters (Iterable[str]): Filters to compute, see pimp_all.
+    chunk_size (int): Number of images processed at a time, to bound the \
+temporary memory (defaults to the whole stack).
+    workers (int): Number of threads sharing the chunks (defaults to 1).
+    out (dict): Optional preallocated (N, H, W, RGB) buffers, by filter name.
+
+Return:
+    dict: The filtered stacks, by filter name.
+    """
+    try:
+        validate_array(stack)
+        if stack.ndim != 4:
+            raise ValueError("Stack must be in (N, H, W, RGB) format")
+        filters = _check_filters(filters)
+        if chunk_size is None:
+            chunk_size = max(1, len(stack) // (workers or 1))
+        if chunk_size < 1 or (workers is not None and workers < 1):
+            raise ValueError("chunk_size and workers must be positive")
+
+        results = {name: _output(name, stack, out) for name in filters}
+        chunks = [slice(start, start + chunk_size)
+                  for start in range(0, len(stack), chunk_size)]
+
+        def run(chunk: slice):
+            _compute(stack[chunk], {
+                name: result[chunk] for name, result in results.items()})
+
+        if workers is None or workers == 1:
+            for chunk in chunks:
+                run(chunk)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(run, chunks))
+        return results
+    except ValueError as e:
+        print(f"Error: {e}")
+    except Exception as e:
+        print(f"An unexpected error occurred: ft_batch: {e}")
+    return None
+
+
+class PointOp:
+    """
+Per-pixel operation defined by a 256-entry lookup table per channel. \
+Consecutive point operations are fused into one table.
+
+Parameters:
+    table (np.ndarray): (256,) table applied to every channel, or (3, 256) \
+tables for the red, green and blue channels.
+    name (str): Name shown in the chain description.
+    """
+
+    def __init__(self, table, name: str = "lut"):
+        table = np.asarray(table)
+        if table.shape not in [(256,), (3, 256)]:
+            raise ValueError("Lookup table must be (256,) or (3, 256)")
+        self.table = np.ascontiguousarray(np.broadcast_to(
+            np.clip(table, 0, 255).astype(np.uint8), (3, 256)))
+        self.table.flags.writeable = False
+        self.uniform = bool((self.table == self.table[0]).all())
+        # cv2.LUT layout: one table for every channel, or (256, 1, 3).
+        self.lut = self.table[0] if self.uniform else \
+            np.ascontiguousarray(self.table.T.reshape(256, 1, 3))
+        self.name = name
+
+    def then(self, other: "PointOp") -> "PointOp":
+        """Returns the point operation applying self, then other."""
+        fused = np.take_along_axis(
+            other.table, self.table.astype(np.intp), axis=1)
+        return PointOp(fused, f"{self.name}+{other.name}")
+
+    def __call__(self, array, out=None) -> np.ndarray:
+        if array.dtype != np.uint8:
+            raise ValueError("Lookup tables only apply to uint8 images")
+        if out is None:
+            out = np.empty_like(array)
+        elif out.shape != array.shape or out.dtype != np.uint8:
+            raise ValueError("Output buffer does not match the image")
+        if cv2 is not None and out.flags.c_contiguous:
+            # One pass over the image; stacks are seen as one tall image.
+            shape = (-1,) + array.shape[-2:]
+            cv2.LUT(array.reshape(shape), self.lut, dst=out.reshape(shape))
+        elif self.uniform:
+            np.take(self.table[0], array, out=out)
+        else:
+            for channel in range(3):
+                out[..., channel] = self.table[channel][array[..., channel]]
+        return out
+
+    def __repr__(self) -> str:
+        return f"PointOp({self.name})"
+
+
+def _identity() -> np.ndarray:
+    return np.arange(256, dtype=np.float64)
+
+
+def invert_op() -> PointOp:
+    """
+Point operation of ft_invert.
+    """
+    return PointOp(255 - _identity(), "invert")
+
+
+def channel_op(name: str) -> PointOp:
+    """
+Point operation of ft_red, ft_green or ft_blue: keeps one channel and \
+sets the others to zero.
+    """
+    if name not in CHANNELS:
+        raise ValueError(f"Unknown channel '{name}'")
+    table = np.zeros((3, 256))
+    table[CHANNELS[name]] = _identity()
+    return PointOp(table, name)
+
+
+def brightness_op(delta: int) -> PointOp:
+    """
+Adds delta to every channel, clipped to [0, 255].
+    """
+    return PointOp(_identity() + delta, f"brightness({delta})")
+
+
+def contrast_op(factor: float) -> PointOp:
+    """
+Scales the distance of every channel to mid-grey (128) by factor, \
+clipped to [0, 255].
+    """
+    table = np.rint((_identity() - 128) * factor + 128)
+    return PointOp(table, f"contrast({factor})")
+
+
+def gamma_op(gamma: float) -> PointOp:
+    """
+Applies a gamma correction: out = 255 * (in / 255) ** (1 / gamma).
+    """
+    if gamma <= 0:
+        raise ValueError("Gamma must be positive")
+    table = np.rint(255 * (_identity() / 255) ** (1 / gamma))
+    return PointOp(table, f"gamma({gamma})")
+
+
+def grey_op(array, out=None) -> np.ndarray:
+    """
+Grey step of a filter chain (ft_grey). It mixes the channels, so it \
+cannot be fused with point operations.
+    """
+    grey = grey_plane(array)
+    if out is None:
+        out = np.empty(array.shape, dtype=np.uint8)
+    out[...] = grey[..., np.newaxis]
+    return out
+
+
+class FilterChain:
+    """
+Chain of filters applied in order. Consecutive point operations are \
+fused into a single lookup table and every step writes into the same \
+output buffer, so the chain costs one pass per unfusable step and no \
+intermediate images.
+
+Parameters:
+    *ops: Point operations (PointOp) or functions f(array, out) returning \
+the filtered (H, W, RGB) image, such as grey_op.
+    """
+
+    def __init__(self, *ops):
+        self.steps = []
+        for op in ops:
+            if not isinstance(op, PointOp) and not callable(op):
+                raise TypeError(f"Invalid filter: {op!r}")
+            if (isinstance(op, PointOp) and self.steps
+                    and isinstance(self.steps[-1], PointOp)):
+                self.steps[-1] = self.steps[-1].then(op)
+            else:
+                self.steps.append(op)
+
+    def __call__(self, array, out=None) -> np.ndarray:
+        """
+Applies the chain to an (H, W, RGB) image or an (N, H, W, RGB) stack, \
+without displaying it.
+
+Parameters:
+    array (np.ndarray): The image or stack.
+    out (np.ndarray): Optional preallocated output, of the shape and \
+dtype of array.
+
+Return:
+    np.ndarray: The filtered image, or None if an error occurs.
+        """
+        try:
+            validate_array(array)
+            if out is not None and (out.shape != array.shape
+                                    or out.dtype != array.dtype):
+                raise ValueError("Output buffer does not match the image")
+            if not self.steps:
+                if out is None:
+                    return array.copy()
+                out[...] = array
+                return out
+
+            result = array
+            for step in self.steps:
+                result = step(result, out)
+                out = result
+            return result
+        except ValueError as e:
+            print(f"Error: {e}")
+        except Exception as e:
+            print(f"An unexpected error occurred: FilterChain: {e}")
+        return None
+
+    def __repr__(self) -> str:
+        names = [getattr(step, "__name__", repr(step)) for step in self.steps]
+        return f"FilterChain({', '.join(names)})"
+
+
+def compose_filters(*ops) -> FilterChain:
+    """
+Builds a FilterChain, e.g. compose_filters(grey_op, invert_op(), \
+gamma_op(2.2)).
+    """
+    return FilterChain(*ops)
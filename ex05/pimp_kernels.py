@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+import os
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Kernels may be launched from worker threads (thread pools of the image
+# programs): Numba's TBB layer then hangs at interpreter exit, OpenMP does
+# not. The NUMBA_THREADING_LAYER* variables still take precedence.
+if numba is not None and not any(
+        name.startswith("NUMBA_THREADING_LAYER") for name in os.environ):
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+
+BACKENDS = ("numpy", "numba")
+ENV_VAR = "FT_BACKEND"
+
+
+def _jit(func):
+    """Compiles a kernel with Numba (parallel loops), when installed."""
+    if numba is None:
+        return func
+    return numba.njit(parallel=True, cache=True)(func)
+
+
+prange = numba.prange if numba is not None else range
+
+
+def available_backends() -> tuple:
+    """Returns the backends that can be selected on this installation."""
+    return BACKENDS if numba is not None else ("numpy",)
+
+
+def _initial_backend() -> str:
+    """Backend selected by the FT_BACKEND environment variable: "numpy", \
+"numba" or "auto" (the default: numba when installed). A backend that is \
+not installed falls back to numpy."""
+    name = os.environ.get(ENV_VAR, "auto").lower()
+    if name == "auto":
+        return available_backends()[-1]
+    return name if name in available_backends() else "numpy"
+
+
+_backend = _initial_backend()
+
+
+def get_backend() -> str:
+    """Returns the name of the selected backend."""
+    return _backend
+
+
+def set_backend(name: str):
+    """Selects the backend running the kernels.
+
+Parameters:
+    name (str): "numpy" or "numba".
+
+Returns:
+    None
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'")
+    if name not in available_backends():
+        raise ValueError(f"Backend '{name}' is not installed")
+    _backend = name
+
+
+@contextmanager
+def use_backend(name: str):
+    """Selects a backend for the duration of a with block."""
+    previous = get_backend()
+    set_backend(name)
+    try:
+        yield
+    finally:
+        set_backend(previous)
+
+
+def jit_enabled() -> bool:
+    """Returns True when the compiled kernels are selected."""
+    return _backend == "numba"
+
+
+@_jit
+def _grey_kernel(pixels, out):
+    for i in prange(pixels.shape[0]):
+        red, green, blue = pixels[i, 0], pixels[i, 1], pixels[i, 2]
+        total = np.int64(red) + np.int64(green) + np.int64(blue)
+        if total % 9 == 0:
+            out[i] = np.uint8((red / 3 + green / 3 + blue / 3) / 3)
+        else:
+            out[i] = np.uint8(total // 9)
+
+
+def grey_plane(array) -> np.ndarray:
+    """Compiled version of pimp_image.grey_plane for uint8 (..., 3) arrays.
+    """
+    pixels = np.ascontiguousarray(array).reshape(-1, 3)
+    grey = np.empty(len(pixels), dtype=np.uint8)
+    _grey_kernel(pixels, grey)
+    return grey.reshape(array.shape[:-1])
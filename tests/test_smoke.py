@@ -0,0 +1,211 @@
+"""Import-and-call smoke tests of the exercise programs.
+
+Each case runs in a fresh interpreter with only its exercise directories
+on the path, as the programs are run, under both kernel backends. A
+crash, a wrong import across exercises or a hang at exit fails the case.
+"""
+from importlib.util import find_spec
+import os
+import subprocess
+import sys
+import textwrap
+import numpy as np
+from PIL import Image
+import pytest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKENDS = [
+    "numpy",
+    pytest.param("numba", marks=pytest.mark.skipif(
+        find_spec("numba") is None, reason="numba is not installed")),
+]
+TIMEOUT = 300
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request) -> str:
+    return request.param
+
+
+@pytest.fixture
+def jpeg(tmp_path) -> str:
+    ys = np.linspace(0, 255, 600)[:, np.newaxis, np.newaxis]
+    xs = np.linspace(0, 255, 800)[np.newaxis, :, np.newaxis]
+    img = ((ys + xs * [1, 0.5, 0.2]) % 256).astype(np.uint8)
+    path = tmp_path / "images" / "img.jpg"
+    path.parent.mkdir()
+    Image.fromarray(img).save(path)
+    return str(path)
+
+
+def run(code: str, *exercises: str, backend: str, args=(),
+        cwd: str = None) -> str:
+    """Runs code in a new interpreter with the exercise directories first \
+on the path, and returns its output."""
+    env = dict(os.environ, FT_BACKEND=backend, MPLBACKEND="Agg",
+               PYTHONPATH=os.pathsep.join(
+                   os.path.join(ROOT, ex) for ex in exercises))
+    result = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code), *args],
+        cwd=cwd or ROOT, env=env, capture_output=True, text=True,
+        timeout=TIMEOUT)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_give_bmi(backend):
+    out = run("""
+        from give_bmi import give_bmi, apply_limit
+        bmi = give_bmi([2.71, 1.15], [165.3, 38.4])
+        assert apply_limit(bmi, 26) == [False, True], bmi
+        print("ok")
+        """, "ex00", backend=backend)
+    assert out.strip().endswith("ok")
+
+
+def test_slice_me(backend):
+    out = run("""
+        import numpy as np
+        from array2D import slice_me
+        family = [[1.80, 78.4], [2.15, 102.7], [2.10, 98.5]]
+        assert slice_me(family, 0, 2) == family[:2]
+        batch = np.array([family, family])
+        assert slice_me(batch, 0, 1, columns=1).shape == (1, 3)
+        try:
+            slice_me([[1, [2]]], 0, 1)
+        except TypeError:
+            print("ok")
+        """, "ex01", backend=backend)
+    assert out.strip().endswith("ok")
+
+
+def test_zoom_and_memo(backend, jpeg):
+    out = run("""
+        import sys
+        from load_image import ft_load
+        from zoom import zoom, rgb_to_gray, draw_axes_outside
+        from memo import memoize
+        gray = memoize(rgb_to_gray)(zoom(ft_load(sys.argv[1]), 100))
+        assert gray.shape == (100, 100, 1), gray.shape
+        assert memoize(rgb_to_gray)(zoom(ft_load(sys.argv[1]), 100)) \\
+            .tobytes() == gray.tobytes()
+        draw_axes_outside(gray)
+        print("ok")
+        """, "ex03", backend=backend, args=[jpeg])
+    assert out.strip().endswith("ok")
+
+
+def test_rotate_programs(backend, jpeg):
+    out = run("""
+        import sys
+        import numpy as np
+        from PIL import Image
+        from dag import Graph, program_outputs
+        from rotate import cut, rgb_to_gray, transpose, draw_axes_outside
+        import transform
+        import warp
+        img = np.asarray(Image.open(sys.argv[1]))
+        gray = rgb_to_gray(cut(img, 100)).squeeze()
+        assert transpose(gray).shape == (100, 100)
+        draw_axes_outside(transpose(gray))
+        assert transform.rotate90(img).shape == (800, 600, 3)
+        rotated = warp.rotate(img, 30, border_value=255)
+        assert (rotated[0, 0] == 255).all(), rotated[0, 0]
+        graph = Graph()
+        results = graph.run(program_outputs(graph, sys.argv[1], 100))
+        assert graph.report["shared"] > 0, graph.report
+        print("ok")
+        """, "ex04", backend=backend, args=[jpeg])
+    assert out.strip().endswith("ok")
+
+
+def test_tiled_image_and_stream(backend, jpeg, tmp_path):
+    out = run("""
+        import os, sys
+        import numpy as np
+        from PIL import Image
+        from tiled_image import TiledImage
+        from stream import StreamPipeline
+        img = np.asarray(Image.open(sys.argv[1]))
+        tiled = TiledImage.from_array(img, os.path.join(sys.argv[2], "a.npy"))
+        gray = tiled.cut(100, os.path.join(sys.argv[2], "c.npy")).rgb_to_gray(
+            os.path.join(sys.argv[2], "g.npy"))
+        assert gray.shape[:2] == (100, 100), gray.shape
+        report = StreamPipeline(os.path.dirname(sys.argv[1]), size=100).run()
+        assert report["frames"] == 1, report
+        print("ok")
+        """, "ex04", backend=backend, args=[jpeg, str(tmp_path)])
+    assert out.strip().endswith("ok")
+
+
+def test_service_with_filters(backend, jpeg, tmp_path):
+    out = run("""
+        import asyncio, os, sys
+        import service
+
+        async def main():
+            images, outputs = os.path.split(sys.argv[1])
+            app = service.ImageService(output_dir=sys.argv[2],
+                                       input_dir=images)
+            for ops in (["grey"], [["crop", 100], "gray", "squeeze",
+                                   "transpose", ["rotate", 30]]):
+                answer = await app.process({"path": outputs, "ops": ops,
+                                            "output": "out.png"})
+                assert answer["ok"], answer
+            answer = await app.process({"path": sys.argv[1]})
+            assert not answer["ok"], answer
+            server = await app.start("127.0.0.1", 0)
+            server.close()
+            try:
+                await app.start("0.0.0.0", 0)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("non-loopback host accepted")
+            app.close()
+
+        asyncio.run(main())
+        print("ok")
+        """, "ex04", "ex05", backend=backend, args=[jpeg, str(tmp_path)])
+    assert out.strip().endswith("ok")
+
+
+def test_pimp_image(backend, jpeg, tmp_path):
+    out = run("""
+        import os, sys
+        import numpy as np
+        from PIL import Image
+        from pimp_image import pimp_all, compose_filters, invert_op, \\
+            channel_op, ft_grey
+        from channel_stats import ft_stats
+        from display import DisplayQueue
+        from batch_runner import BatchRunner
+        img = np.asarray(Image.open(sys.argv[1]))
+        results = pimp_all(img)
+        assert results["grey"].tobytes() == ft_grey(img).tobytes()
+        chain = compose_filters(invert_op(), channel_op("red"))
+        assert chain(img)[..., 1].max() == 0
+        assert ft_stats(img)["red"]["max"] <= 255
+        with DisplayQueue("sheet", os.path.join(sys.argv[2], "s.png")) as d:
+            d.put(img, "img")
+        assert not d.errors, d.errors
+        report = BatchRunner(os.path.dirname(sys.argv[1]),
+                             os.path.join(sys.argv[2], "out"),
+                             workers=1).run()
+        assert report["images"] == 1 and not report["failed"], report
+        print("ok")
+        """, "ex05", backend=backend, args=[jpeg, str(tmp_path)])
+    assert out.strip().endswith("ok")
+
+
+def test_bench_runs_twice(backend, tmp_path):
+    for _ in range(2):
+        out = run("""
+            import sys
+            import bench_pipeline
+            bench_pipeline.run(["256"], repeat=1, verbose=False,
+                               stages=["ex03.rgb", "ex04.rgb", "ex05.ft_grey"])
+            print("ok")
+            """, "bench", backend=backend)
+        assert out.strip().endswith("ok")